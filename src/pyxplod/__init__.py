@@ -2,6 +2,15 @@
 """pyxplod: Python code exploder - extracts classes and functions into separate files."""
 
 from pyxplod.__version__ import __version__
-from pyxplod.cli import main  # Updated import
 
 __all__ = ["__version__", "main"]
+
+
+def __getattr__(name: str) -> object:
+    # Import the CLI lazily so lightweight submodules like pyxplod.client start fast
+    if name == "main":
+        from pyxplod.cli import main  # noqa: PLC0415
+
+        return main
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
@@ -23,11 +23,11 @@ def analyze_name_usage(node: ast.AST) -> set[str]:
     names: set[str] = set()
 
     class NameCollector(ast.NodeVisitor):
-        def visit_Name(self, node: ast.Name) -> None:  # noqa: N802
+        def visit_Name(self, node: ast.Name) -> None:
             names.add(node.id)
             self.generic_visit(node)
 
-        def visit_Attribute(self, node: ast.Attribute) -> None:  # noqa: N802
+        def visit_Attribute(self, node: ast.Attribute) -> None:
             # For attributes like os.path, we want 'os'
             if isinstance(node.value, ast.Name):
                 names.add(node.value.id)
@@ -132,3 +132,108 @@ def find_module_variables(tree: ast.AST) -> list[tuple[ast.stmt, str]]:
             # Handle simple assignments like: variable = expression
             variables.extend((node, target.id) for target in node.targets if isinstance(target, ast.Name))
     return variables
+
+
+def is_shareable_import(imp: ast.stmt) -> bool:
+    """Check whether an import can be moved into a shared imports module.
+
+    __future__ imports must stay in the module they affect, and star imports
+    do not bind names that could be re-imported individually.
+    """
+    if isinstance(imp, ast.ImportFrom):
+        return imp.module != "__future__" and all(alias.name != "*" for alias in imp.names)
+    return isinstance(imp, ast.Import)
+
+
+def imported_names(imports: list[ast.stmt]) -> list[str]:
+    """Return the names bound by import statements, in order and without duplicates."""
+    names: dict[str, None] = {}
+    for imp in imports:
+        if isinstance(imp, ast.Import):
+            for alias in imp.names:
+                # 'import os.path' binds 'os'
+                names[alias.asname or alias.name.split(".")[0]] = None
+        elif isinstance(imp, ast.ImportFrom):
+            for alias in imp.names:
+                names[alias.asname or alias.name] = None
+    return list(names)
+
+
+def defines_all(tree: ast.Module) -> bool:
+    """Check whether a module binds __all__ at top level."""
+    for node in tree.body:
+        targets = node.targets if isinstance(node, ast.Assign) else [getattr(node, "target", None)]
+        if any(isinstance(target, ast.Name) and target.id == "__all__" for target in targets):
+            return True
+    return False
+
+
+def public_names(tree: ast.Module) -> set[str]:
+    """Return the public names a module exposes: its literal __all__, or its public top-level bindings."""
+    names: set[str] = set()
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets
+        ):
+            try:
+                return set(ast.literal_eval(node.value))
+            except ValueError:
+                pass
+        if isinstance(node, ast.ClassDef | ast.FunctionDef | ast.AsyncFunctionDef):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign):
+            names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+        elif isinstance(node, ast.AnnAssign | ast.AugAssign) and isinstance(node.target, ast.Name):
+            names.add(node.target.id)
+        elif isinstance(node, ast.Import | ast.ImportFrom):
+            names.update(name for name in imported_names([node]) if name != "*")
+    return {name for name in names if not name.startswith("_")}
+
+
+def share_imports(imports: list[ast.stmt], module_path: str) -> list[ast.stmt]:
+    """Replace shareable imports with one import of their names from a shared imports module.
+
+    Imports that cannot be shared are kept; __future__ imports stay first.
+    """
+    shared = [imp for imp in imports if is_shareable_import(imp)]
+    if not shared:
+        return imports
+    kept = [imp for imp in imports if not is_shareable_import(imp)]
+    future = [imp for imp in kept if isinstance(imp, ast.ImportFrom) and imp.module == "__future__"]
+    others = [imp for imp in kept if imp not in future]
+    shared_import = ast.ImportFrom(
+        module=module_path,
+        names=[ast.alias(name=name, asname=None) for name in imported_names(shared)],
+        level=0,  # Module path carries the leading dot, as in create_import_statement
+    )
+    return [*future, shared_import, *others]
+
+
+LAZY_LOADER_TEMPLATE = """
+from importlib import import_module as _import_module
+_LAZY_SUBMODULES = {mapping!r}
+
+def __getattr__(name):
+    module_path = _LAZY_SUBMODULES.get(name)
+    if module_path is None:
+        raise AttributeError(f'module {{__name__!r}} has no attribute {{name!r}}')
+    value = getattr(_import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted({{*globals(), *_LAZY_SUBMODULES}})
+"""
+
+
+def create_lazy_loader(submodules: dict[str, str], all_names: list[str] | None = None) -> list[ast.stmt]:
+    """Create a PEP 562 module __getattr__ and __dir__ that import submodules on first access.
+
+    Args:
+        submodules: Mapping of exported names to relative module paths, e.g. {'MyClass': '.my_class'}
+        all_names: Names for an __all__ assignment, so star imports also see the lazy names
+    """
+    body = ast.parse(LAZY_LOADER_TEMPLATE.format(mapping=submodules)).body
+    if all_names is not None:
+        body.extend(ast.parse(f"__all__ = {all_names!r}").body)
+    return body
@@ -0,0 +1,143 @@
+# this_file: src/pyxplod/checkpoint.py
+"""Crash-recovery checkpoints for long explosion runs.
+
+A run appends one JSON line per completed input file to a journal in the output
+directory. Lines are written in batches, every few seconds or files: the
+outputs of the batch are fsynced first, then the journal lines are written and
+fsynced. A journal entry therefore never outlives the outputs it vouches for,
+even when the whole machine goes away (e.g. a preempted VM), and a crash loses
+at most one batch of work. A `--resume` run skips files whose journal entry still
+matches their size and modification time, provided the input, method and method
+options are the same as in the journal. The journal is removed once a run
+completes without failures.
+"""
+
+import json
+import os
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, TextIO
+
+from loguru import logger
+
+CHECKPOINT_FILENAME = ".pyxplod-checkpoint"
+# A batch of completed files is made durable after this many seconds or files
+SYNC_INTERVAL = 2.0
+SYNC_BATCH_SIZE = 256
+
+
+def fsync_path(path: Path) -> None:
+    """Flush a file or directory to disk, skipping paths that are gone or cannot be synced."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        # Directories cannot be fsynced on some platforms, e.g. Windows
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def file_stamp(path: Path) -> tuple[int, int]:
+    """Return the (mtime_ns, size) pair used to detect changed input files."""
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Checkpoint:
+    """Append-only journal of completed input files."""
+
+    def __init__(
+        self,
+        output_path: Path,
+        input_path: Path,
+        method: str,
+        *,
+        resume: bool = False,
+        options: dict[str, Any] | None = None,
+    ) -> None:
+        self.path = output_path / CHECKPOINT_FILENAME
+        # Outputs depend on the method options too, so they are part of the run configuration
+        self.header = {"input": str(input_path), "method": method, "options": options or {}}
+        self.completed: dict[str, tuple[int, int]] = {}
+        if resume:
+            self._load()
+
+        mode = "a" if self.completed else "w"
+        self._journal: TextIO | None = self.path.open(mode, encoding="utf-8")
+        if mode == "w":
+            self._journal.write(json.dumps(self.header) + "\n")
+            self._journal.flush()
+        # Completed files and their outputs not yet made durable
+        self._pending: list[tuple[str, tuple[int, int]]] = []
+        self._pending_outputs: set[Path] = set()
+        self._last_sync = time.monotonic()
+
+    def _load(self) -> None:
+        """Read completed files from an existing journal of the same run configuration."""
+        if not self.path.exists():
+            logger.warning(f"No checkpoint found in {self.path.parent}, starting from scratch")
+            return
+        lines = self.path.read_text(encoding="utf-8").splitlines()
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except json.JSONDecodeError:
+            header = None
+        if header != self.header:
+            logger.warning(f"Checkpoint {self.path} belongs to a different run, starting from scratch")
+            return
+        for line in lines[1:]:
+            try:
+                relative_name, mtime_ns, size = json.loads(line)
+            except (json.JSONDecodeError, ValueError):
+                # A torn last line from a crash mid-write; the file is simply redone
+                continue
+            self.completed[relative_name] = (mtime_ns, size)
+        logger.info(f"Resuming: {len(self.completed)} files already completed")
+
+    def is_done(self, relative_name: str, stamp: tuple[int, int]) -> bool:
+        """Check whether a file was completed by a previous run and is unchanged since."""
+        return self.completed.get(relative_name) == stamp
+
+    def mark_done(self, relative_name: str, stamp: tuple[int, int], outputs: Iterable[Path] = ()) -> None:
+        """Record a completed file, whose output files are outputs, in the next journal batch."""
+        if self._journal is None:
+            return
+        self.completed[relative_name] = stamp
+        self._pending.append((relative_name, stamp))
+        self._pending_outputs.update(outputs)
+        if len(self._pending) >= SYNC_BATCH_SIZE or time.monotonic() - self._last_sync >= SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self) -> None:
+        """Make the pending outputs durable, then journal their files durably."""
+        if self._journal is None or not self._pending:
+            return
+        for path in self._pending_outputs:
+            fsync_path(path)
+        # New directory entries are only durable once their directories are synced
+        for directory in {path.parent for path in self._pending_outputs}:
+            fsync_path(directory)
+        self._journal.writelines(json.dumps([name, *stamp]) + "\n" for name, stamp in self._pending)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._pending.clear()
+        self._pending_outputs.clear()
+        self._last_sync = time.monotonic()
+
+    def close(self, *, success: bool) -> None:
+        """Close the journal, removing it when the run completed without failures."""
+        if self._journal is None:
+            return
+        if not success:
+            self.sync()
+        self._journal.close()
+        self._journal = None
+        if success:
+            self.path.unlink(missing_ok=True)
+        else:
+            logger.info(f"Checkpoint kept at {self.path}; rerun with --resume to retry remaining files")
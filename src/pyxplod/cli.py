@@ -9,6 +9,7 @@
 # this_file: src/pyxplod/cli.py
 """Command Line Interface for pyxplod."""
 
+import sys
 from pathlib import Path
 
 # For Python 3.9+, list is a standard type for hinting.
@@ -16,34 +17,124 @@ from loguru import logger
 from rich.console import Console
 from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
 
+from pyxplod import events
+from pyxplod.checkpoint import Checkpoint, file_stamp
+from pyxplod.dedup import SourceDeduplicator, copy_outputs, group_identical
 from pyxplod.file_utils import find_python_files, validate_paths
-from pyxplod.processors import process_python_file, process_python_file_dirs
+from pyxplod.processors.process_chunks_method import CHUNK_UNITS, DEFAULT_CHUNK_BUDGET
+from pyxplod.reader import prefetch_sources
+from pyxplod.scheduler import load_timings, run_scheduled, save_timings
+from pyxplod.shared_definitions import share_definitions
+from pyxplod.stream import STREAM_PATH, explode_single
+from pyxplod.verify import verify_tree
 
 # Global console instance
 console = Console()
 
 
-def main(input_dir_str: str, output: str, method: str = "files", *, verbose: bool = False) -> None:
+def main(
+    input_dir_str: str,
+    output: str,
+    method: str = "files",
+    *,
+    verbose: bool = False,
+    stdin_name: str = "stdin.py",
+    hardlink: bool = False,
+    log_mode: str = "lines",
+    event_log: str | None = None,
+    summary_interval: float = events.DEFAULT_SUMMARY_INTERVAL,
+    resume: bool = False,
+    jobs: int = 1,
+    shared_imports: bool = False,
+    lazy_init: bool = False,
+    chunk_budget: int = DEFAULT_CHUNK_BUDGET,
+    chunk_unit: str = "bytes",
+    dedup_definitions: bool = False,
+    verify: bool = False,
+) -> None:
     """Explode a Python project by extracting classes and functions into separate files.
 
     Args:
-        input_dir_str: Path to the input directory containing Python files
-        output: Path to the output directory where exploded files will be created
-        method: Explosion method - 'files' (default) or 'dirs'
+        input_dir_str: Path to the input directory containing Python files, a single .py file,
+            or '-' to read one module from stdin
+        output: Path to the output directory where exploded files will be created,
+            or '-' to write a single exploded module to stdout as a multi-file bundle
+        method: Explosion method - 'files' (default), 'dirs' or 'chunks'
         verbose: Enable verbose logging for debugging
+        stdin_name: Module filename assumed for source read from stdin
+        hardlink: Hard-link the outputs of byte-identical source files instead of writing copies
+        log_mode: 'lines' (default) logs every processed file; 'summary' aggregates per-file
+            events into counters and logs a summary every summary_interval seconds
+        event_log: Optional path of a JSON-lines file receiving every pipeline event
+        summary_interval: Seconds between progress summaries in 'summary' log mode
+        resume: Skip files completed by an interrupted earlier run with the same input and method
+        jobs: Number of worker processes; with more than one, work is scheduled by estimated
+            cost and giant modules are split across workers
+        shared_imports: With the 'dirs' method, emit each package's imports once into _imports.py
+            and re-import the needed names from there
+        lazy_init: With the 'dirs' method, generate __init__.py files that import extracted
+            definitions on first attribute access (PEP 562) instead of eagerly
+        chunk_budget: With the 'chunks' method, maximum estimated size of each chunk module
+        chunk_unit: Unit of chunk_budget - 'bytes' (default) or 'tokens' (estimated from bytes)
+        dedup_definitions: Move definitions extracted identically in several modules of a package
+            into one shared module each and import them from there
+        verify: Instead of exploding, check that the existing output in `output` is equivalent
+            to the input (definition AST hashes and public names) and exit with status 1 on mismatches
     """
     # Validate method parameter
-    if method not in ["files", "dirs"]:
-        logger.error(f"Invalid method '{method}'. Must be 'files' or 'dirs'.")
+    if method not in ["files", "dirs", "chunks"]:
+        logger.error(f"Invalid method '{method}'. Must be 'files', 'dirs' or 'chunks'.")
         return
 
-    # Configure logging
+    if chunk_unit not in CHUNK_UNITS:
+        logger.error(f"Invalid chunk unit '{chunk_unit}'. Must be 'bytes' or 'tokens'.")
+        return
+
+    if log_mode not in ["lines", "summary"]:
+        logger.error(f"Invalid log mode '{log_mode}'. Must be 'lines' or 'summary'.")
+        return
+
+    # Configure logging; keep stdout clean for the bundle when streaming
+    sink = sys.stderr if output == STREAM_PATH else console.print
     if verbose:
         logger.remove()
-        logger.add(console.print, format="{time:HH:mm:ss} | {level} | {message}", level="DEBUG")
+        logger.add(sink, format="{time:HH:mm:ss} | {level} | {message}", level="DEBUG")
     else:
         logger.remove()
-        logger.add(console.print, format="{message}", level="INFO")
+        logger.add(sink, format="{message}", level="INFO")
+
+    if verify:
+        input_path = Path(input_dir_str).resolve()
+        output_path = Path(output).resolve()
+        if not input_path.is_dir() or not output_path.is_dir():
+            logger.error("Verification requires existing input and output directories.")
+            raise SystemExit(1)
+        problems = verify_tree(input_path, output_path, method, jobs=jobs)
+        for problem in problems:
+            logger.error(problem)
+        if problems:
+            logger.error(f"Verification failed: {len(problems)} mismatches between {input_path} and {output_path}")
+            raise SystemExit(1)
+        logger.info(f"✅ {output_path} is equivalent to {input_path} (method '{method}')")
+        return
+
+    # Options for the explode functions of the selected method
+    options = {
+        "shared_imports": shared_imports,
+        "lazy_init": lazy_init,
+        "chunk_budget": chunk_budget,
+        "chunk_unit": chunk_unit,
+    }
+
+    # Single module: skip discovery, mkdir and the progress bar
+    if input_dir_str == STREAM_PATH or Path(input_dir_str).is_file():
+        if not explode_single(input_dir_str, output, method, stdin_name, options=options):
+            raise SystemExit(1)
+        return
+
+    if output == STREAM_PATH:
+        logger.error("Writing to stdout requires a single .py file or '-' (stdin) as input.")
+        return
 
     # Convert to Path objects
     input_path = Path(input_dir_str).resolve()  # Changed here
@@ -65,26 +156,121 @@ def main(input_dir_str: str, output: str, method: str = "files", *, verbose: boo
     # Create output directory if it doesn't exist
     output_path.mkdir(parents=True, exist_ok=True)
 
+    # Record completed files so an interrupted run can be resumed
+    checkpoint = Checkpoint(output_path, input_path, method, resume=resume, options=options)
+    stamps = {py_file: file_stamp(py_file) for py_file in python_files}
+    remaining_files = [
+        py_file
+        for py_file in python_files
+        if not checkpoint.is_done(str(py_file.relative_to(input_path)), stamps[py_file])
+    ]
+    # Largest files first, so the remaining tail after a crash or near the end is short
+    remaining_files.sort(key=lambda py_file: stamps[py_file][1], reverse=True)
+    failures = 0
+    reused = 0
+    finished = False
+
+    # Durations of this and earlier parallel runs feed the cost estimates of the scheduler
+    timings = load_timings(output_path) if jobs > 1 else {}
+
+    # Route per-file events through counters when aggregating or logging events to a file
+    if log_mode == "summary" or event_log:
+        events.start(
+            events.EventCounter(
+                aggregate=log_mode == "summary",
+                event_log=Path(event_log) if event_log else None,
+                interval=summary_interval,
+            )
+        )
+
     # Process each file with progress bar
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        console=console,
-    ) as progress:
-        task = progress.add_task("Processing files...", total=len(python_files))
-
-        for py_file in python_files:
-            try:
-                if method == "files":
-                    process_python_file(py_file, output_path, input_path)
-                else:  # method == "dirs"
-                    process_python_file_dirs(py_file, output_path, input_path)
-                progress.update(task, advance=1)
-            except Exception as e:
-                logger.error(f"Failed to process {py_file}: {e}")
-                if verbose:
-                    logger.exception("Detailed error:")
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+            console=console,
+        ) as progress:
+            task = progress.add_task(
+                "Processing files...", total=len(python_files), completed=len(python_files) - len(remaining_files)
+            )
+
+            if jobs > 1:
+                # Identical sources are exploded once, then their outputs copied to the duplicates
+                groups = group_identical(remaining_files)
+                results = run_scheduled(
+                    list(groups), output_path, input_path, method, jobs=jobs, timings=timings, options=options
+                )
+                for py_file, written, seconds, recorded, error in results:
+                    relative_path = py_file.relative_to(input_path)
+                    # Workers only collect their events; log, count and journal them here
+                    events.replay(recorded)
+                    if error is not None:
+                        failures += 1 + len(groups[py_file])
+                        events.record(
+                            "file_failed", "Failed to process {path}: {error}", "ERROR", path=py_file, error=error
+                        )
+                        continue
+                    timings[str(relative_path)] = [stamps[py_file][1], seconds]
+                    output_dir = output_path / relative_path.parent
+                    checkpoint.mark_done(str(relative_path), stamps[py_file], [output_dir / name for name in written])
+                    progress.update(task, advance=1)
+                    for duplicate in groups[py_file]:
+                        duplicate_path = duplicate.relative_to(input_path)
+                        events.record(
+                            "file_reused",
+                            "Identical to a file processed earlier, reusing outputs from {source}",
+                            "DEBUG",
+                            path=duplicate,
+                            source=output_path / relative_path.parent,
+                        )
+                        copy_outputs(
+                            output_path / relative_path.parent,
+                            output_path / duplicate_path.parent,
+                            written,
+                            hardlink=hardlink,
+                        )
+                        checkpoint.mark_done(
+                            str(duplicate_path),
+                            stamps[duplicate],
+                            [output_path / duplicate_path.parent / name for name in written],
+                        )
+                        progress.update(task, advance=1)
+                        reused += 1
+            else:
+                # Identical sources are exploded once and their outputs reused
+                deduplicator = SourceDeduplicator(remaining_files, method, hardlink=hardlink, options=options)
+                # Small files are read ahead in batches while earlier ones are exploded
+                for py_file, data in prefetch_sources(remaining_files):
+                    try:
+                        written = deduplicator.process(py_file, output_path, input_path, data)
+                        checkpoint.mark_done(str(py_file.relative_to(input_path)), stamps[py_file], written)
+                        progress.update(task, advance=1)
+                    except Exception as e:
+                        failures += 1
+                        events.record(
+                            "file_failed", "Failed to process {path}: {error}", "ERROR", path=py_file, error=e
+                        )
+                        if verbose:
+                            logger.exception("Detailed error:")
+                reused = deduplicator.reused
+        if dedup_definitions:
+            relative_paths = [py_file.relative_to(input_path) for py_file in python_files]
+            shared = share_definitions(output_path, relative_paths, method)
+            logger.info(f"Removed {shared} duplicate definitions in favour of shared modules")
+        finished = True
+    finally:
+        counter = events.stop()
+        # Keep the journal after interruptions and failures so --resume can pick up the rest
+        checkpoint.close(success=finished and failures == 0)
+        if jobs > 1:
+            # Drop the entries of files that were removed from the input since they were recorded
+            current = {str(py_file.relative_to(input_path)) for py_file in python_files}
+            save_timings(output_path, {name: timing for name, timing in timings.items() if name in current})
 
+    if counter is not None and counter.aggregate:
+        logger.info(f"Summary: {counter.summary()}")
+    if reused:
+        logger.info(f"Reused outputs for {reused} files identical to others")
     logger.info(f"✨ Successfully exploded {len(python_files)} files to {output_path} using method '{method}'")
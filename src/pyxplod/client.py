@@ -0,0 +1,88 @@
+# this_file: src/pyxplod/client.py
+"""Thin client that forwards explosion requests to a running pyxplod daemon.
+
+Only the standard library is imported here (argparse rather than fire) so that
+a client invocation costs little more than interpreter startup.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+
+def default_socket_path() -> Path:
+    """Return the per-user default socket: in $XDG_RUNTIME_DIR, or named after the uid in the temp directory."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "pyxplod.sock"
+    user = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    return Path(tempfile.gettempdir()) / f"pyxplod-{user}.sock"
+
+
+# Shared with pyxplod.daemon, which imports it from here
+DEFAULT_SOCKET_PATH = default_socket_path()
+DEFAULT_TIMEOUT = 600.0
+
+
+def send_request(request: dict, socket_path: str | Path | None = None, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """Send one request to the daemon and return its decoded response."""
+    path = str(socket_path or DEFAULT_SOCKET_PATH)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            return json.loads(reader.readline())
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point for the pyxplod-client command."""
+    parser = argparse.ArgumentParser(prog="pyxplod-client", description="Forward a request to the pyxplod daemon.")
+    parser.add_argument("input", nargs="?", help="Input directory containing Python files")
+    parser.add_argument("output", nargs="?", help="Output directory for exploded files")
+    parser.add_argument("--method", default="files", help="Explosion method - 'files' (default), 'dirs' or 'chunks'")
+    parser.add_argument("--shared-imports", action="store_true", help="Share package imports via _imports.py (dirs)")
+    parser.add_argument("--lazy-init", action="store_true", help="Generate lazy-loading __init__.py files (dirs)")
+    parser.add_argument("--chunk-budget", type=int, default=None, help="Maximum estimated chunk size (chunks)")
+    parser.add_argument("--chunk-unit", default="bytes", help="Unit of --chunk-budget - 'bytes' or 'tokens' (chunks)")
+    parser.add_argument("--socket", default=None, help="Unix socket of the daemon")
+    parser.add_argument("--stats", action="store_true", help="Print daemon cache statistics")
+    parser.add_argument("--shutdown", action="store_true", help="Stop the daemon")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        request = {"command": "stats"}
+    elif args.shutdown:
+        request = {"command": "shutdown"}
+    elif args.input and args.output:
+        request = {
+            "command": "explode",
+            "input": str(Path(args.input).resolve()),
+            "output": str(Path(args.output).resolve()),
+            "method": args.method,
+            "options": {
+                "shared_imports": args.shared_imports,
+                "lazy_init": args.lazy_init,
+                "chunk_unit": args.chunk_unit,
+                **({"chunk_budget": args.chunk_budget} if args.chunk_budget is not None else {}),
+            },
+        }
+    else:
+        parser.error("input and output are required unless --stats or --shutdown is given")
+
+    try:
+        response = send_request(request, args.socket)
+    except OSError as e:
+        print(f"Cannot reach pyxplod daemon: {e}", file=sys.stderr)  # noqa: T201
+        return 2
+
+    print(json.dumps(response))  # noqa: T201
+    return 0 if response.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+# this_file: src/pyxplod/daemon.py
+"""Long-lived local daemon that keeps explosion results warm between requests.
+
+The daemon listens on a Unix socket and answers one JSON request per connection.
+Exploded outputs are cached per source file in an LRU cache keyed by path, method
+and options, validated by (mtime, size) and, when those change, by a content hash.
+Repeat explosions of mostly-unchanged trees therefore skip reading, parsing,
+analysis and code generation, and only rewrite outputs that are missing.
+
+Use `pyxplod.client` (the `pyxplod-client` command) to forward requests.
+"""
+
+import hashlib
+import json
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import fire
+from loguru import logger
+
+from pyxplod.client import DEFAULT_SOCKET_PATH, send_request
+from pyxplod.file_utils import find_python_files, validate_paths, write_outputs
+from pyxplod.reader import open_source
+from pyxplod.stream import EXPLODERS, get_exploder
+
+DEFAULT_CACHE_SIZE = 4096
+# Seconds to wait for a daemon already listening on the socket to answer
+PROBE_TIMEOUT = 2.0
+# Largest request line the daemon accepts
+MAX_REQUEST_BYTES = 1 << 20
+
+
+class CacheEntry:
+    """Cached explosion result of one source file."""
+
+    __slots__ = ("digest", "outputs", "stamp", "written")
+
+    def __init__(self, stamp: tuple[int, int], digest: str, outputs: dict[str, str | bytes]) -> None:
+        self.stamp = stamp
+        self.digest = digest
+        self.outputs = outputs
+        # Output directories these outputs have already been written to
+        self.written: set[Path] = set()
+
+
+class ExplodeCache:
+    """Thread-safe LRU cache of explosion results."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, str], CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[str, str, str]) -> CacheEntry | None:
+        """Return the entry for key and mark it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple[str, str, str], entry: CacheEntry) -> None:
+        """Store an entry, evicting the least recently used ones over capacity."""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def explode_tree_cached(
+    input_path: Path, output_path: Path, method: str, cache: ExplodeCache, options: dict | None = None
+) -> dict:
+    """Explode a directory tree, reusing cached results for unchanged files.
+
+    Returns a summary with counts of files found, served from cache, exploded and failed.
+    """
+    summary = {"files": 0, "cached": 0, "exploded": 0, "failed": 0}
+    explode = get_exploder(method, options)
+    options_key = json.dumps(options or {}, sort_keys=True)
+
+    for py_file in find_python_files(input_path):
+        summary["files"] += 1
+        key = (str(py_file), method, options_key)
+        try:
+            stat = py_file.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+            entry = cache.get(key)
+
+            if entry is not None and entry.stamp == stamp:
+                cache.hits += 1
+                summary["cached"] += 1
+            else:
+                with open_source(py_file) as data:
+                    digest = hashlib.sha256(data).hexdigest()
+                    if entry is not None and entry.digest == digest:
+                        # Touched but unchanged: keep the outputs, refresh the stamp
+                        cache.hits += 1
+                        summary["cached"] += 1
+                        entry.stamp = stamp
+                    else:
+                        cache.misses += 1
+                        outputs = explode(data, py_file.name, str(py_file))
+                        entry = CacheEntry(stamp, digest, outputs)
+                        cache.put(key, entry)
+                        summary["exploded"] += 1
+
+            output_dir = output_path / py_file.relative_to(input_path).parent
+            if output_dir not in entry.written or not all((output_dir / name).exists() for name in entry.outputs):
+                write_outputs(output_dir, entry.outputs)
+                entry.written.add(output_dir)
+        except Exception as e:
+            logger.error(f"Failed to process {py_file}: {e}")
+            summary["failed"] += 1
+
+    return summary
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """Handle one JSON-lines request per connection."""
+
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(request)
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server holding the warm explosion cache."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.cache = ExplodeCache(cache_size)
+        super().__init__(str(socket_path), DaemonRequestHandler)
+
+    def dispatch(self, request: dict) -> dict:
+        """Run a decoded request and return the response."""
+        command = request.get("command", "explode")
+        if command == "stats":
+            return {"ok": True, "entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses}
+        if command == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        if command != "explode":
+            return {"ok": False, "error": f"Unknown command '{command}'"}
+
+        method = request.get("method", "files")
+        if method not in EXPLODERS:
+            return {"ok": False, "error": f"Invalid method '{method}'. Must be one of {sorted(EXPLODERS)}."}
+        input_path = Path(request["input"]).resolve()
+        output_path = Path(request["output"]).resolve()
+        if not validate_paths(input_path, output_path):
+            return {"ok": False, "error": f"Invalid input or output path: {input_path}, {output_path}"}
+
+        start = time.perf_counter()
+        summary = explode_tree_cached(input_path, output_path, method, self.cache, request.get("options"))
+        summary["seconds"] = round(time.perf_counter() - start, 4)
+        logger.info("Exploded {}: {}", input_path, summary)
+        return {"ok": summary["failed"] == 0, **summary}
+
+
+def socket_in_use(path: Path) -> bool:
+    """Check whether something answers on a socket path, as opposed to a stale socket left by a crash.
+
+    Paths that cannot be probed, e.g. sockets of other users, count as in use.
+    """
+    try:
+        send_request({"command": "stats"}, path, timeout=PROBE_TIMEOUT)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except (OSError, ValueError):
+        return True
+    return True
+
+
+def serve(socket_path: str | None = None, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+    """Run the pyxplod daemon until it receives a shutdown request.
+
+    Args:
+        socket_path: Unix socket to listen on (defaults to pyxplod.sock in $XDG_RUNTIME_DIR,
+            or pyxplod-<uid>.sock in the temp directory)
+        cache_size: Maximum number of source files kept in the LRU cache
+
+    Raises:
+        SystemExit: If another daemon or process already uses the socket path.
+    """
+    path = Path(socket_path) if socket_path else DEFAULT_SOCKET_PATH
+    if path.exists():
+        if socket_in_use(path):
+            logger.error(f"{path} is in use, e.g. by a running pyxplod daemon; not starting")
+            raise SystemExit(1)
+        # A stale socket left by a daemon that did not shut down cleanly
+        path.unlink()
+    with DaemonServer(path, cache_size) as server:
+        path.chmod(0o600)
+        logger.info(f"pyxplod daemon listening on {path}")
+        try:
+            server.serve_forever()
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def cli() -> None:
+    """Entry point for the pyxplod-daemon command."""
+    fire.Fire(serve)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,149 @@
+# this_file: src/pyxplod/dedup.py
+"""Content-hash deduplication of identical source files.
+
+Monorepos often contain byte-identical modules (vendored copies, generated
+__init__.py files, templated migrations). Since the exploded output of a module
+depends only on its source and its filename, each unique (content, filename)
+pair is exploded once and the result is written to every destination, or
+hard-linked to the first copy.
+
+Files are first bucketed by (size, filename) from a cheap stat, so only files
+that could be duplicates are hashed and only their outputs are kept in memory,
+until the last member of their bucket has been processed.
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+from collections import Counter
+from collections.abc import Iterable
+from contextlib import nullcontext
+from pathlib import Path
+
+from loguru import logger
+
+from pyxplod.events import record
+from pyxplod.file_utils import write_outputs
+from pyxplod.reader import open_source
+from pyxplod.stream import get_exploder
+
+
+def copy_outputs(source_dir: Path, output_dir: Path, names: Iterable[str], *, hardlink: bool = False) -> None:
+    """Copy or hard-link previously written outputs into another directory.
+
+    Hard-linking falls back to copying when it is not possible, e.g. across devices.
+    """
+    for relative_name in names:
+        source_file = source_dir / relative_name
+        output_file = output_dir / relative_name
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        # Replace rather than overwrite, so files hard-linked by a previous run are not written through
+        output_file.unlink(missing_ok=True)
+        if hardlink:
+            try:
+                os.link(source_file, output_file)
+                continue
+            except OSError as e:
+                logger.debug("Cannot hard-link {} to {} ({}), writing a copy", output_file, source_file, e)
+        shutil.copyfile(source_file, output_file)
+
+
+def group_identical(files: list[Path]) -> dict[Path, list[Path]]:
+    """Group byte-identical files with the same filename.
+
+    Returns a mapping of each group's first file to the other members, in input order.
+    Only files sharing size and filename with another file are hashed.
+    """
+    file_buckets = {file: (file.stat().st_size, file.name) for file in files}
+    bucket_sizes = Counter(file_buckets.values())
+
+    groups: dict[Path, list[Path]] = {}
+    first_by_digest: dict[tuple[int, str, str], Path] = {}
+    for file, bucket in file_buckets.items():
+        if bucket_sizes[bucket] == 1:
+            groups[file] = []
+            continue
+        key = (*bucket, hashlib.sha256(file.read_bytes()).hexdigest())
+        first = first_by_digest.setdefault(key, file)
+        if first is file:
+            groups[file] = []
+        else:
+            groups[first].append(file)
+    return groups
+
+
+class SourceDeduplicator:
+    """Explode each unique source once and reuse the result for identical copies."""
+
+    def __init__(self, files: list[Path], method: str, *, hardlink: bool = False, options: dict | None = None) -> None:
+        self.explode = get_exploder(method, options)
+        self.hardlink = hardlink
+        self.reused = 0
+        buckets = Counter((file.stat().st_size, file.name) for file in files)
+        # Remaining files per (size, filename) bucket that may hold duplicates
+        self._pending = {bucket: count for bucket, count in buckets.items() if count > 1}
+        # Outputs and first output directory per bucket and content digest
+        self._memo: dict[tuple[int, str], dict[str, tuple[dict[str, str | bytes], Path]]] = {}
+
+    def process(self, input_file: Path, output_base: Path, input_root: Path, data: bytes | None = None) -> list[Path]:
+        """Explode one file, reusing the outputs of an identical file processed earlier.
+
+        Args:
+            input_file: Source file to explode
+            output_base: Root of the output tree
+            input_root: Root of the input tree
+            data: Content of input_file if already read, e.g. by prefetch_sources
+
+        Returns:
+            The paths of the written output files.
+
+        Raises:
+            SyntaxError: If the source cannot be parsed.
+        """
+        record("file_started", "Processing: {path}", path=input_file)
+        output_dir = output_base / input_file.relative_to(input_root).parent
+        with nullcontext(data) if data is not None else open_source(input_file) as source:
+            outputs = self._process(input_file, output_dir, source)
+        return [output_dir / relative_name for relative_name in outputs]
+
+    def _process(self, input_file: Path, output_dir: Path, data: bytes | mmap.mmap) -> dict[str, str | bytes]:
+        """Explode or reuse the outputs of a file whose content has been read or mapped, returning them."""
+        bucket = (len(data), input_file.name)
+
+        if bucket not in self._pending:
+            outputs = self.explode(data, input_file.name, str(input_file))
+            write_outputs(output_dir, outputs)
+            return outputs
+
+        digest = hashlib.sha256(data).hexdigest()
+        seen = self._memo.setdefault(bucket, {})
+        try:
+            if digest in seen:
+                outputs, first_dir = seen[digest]
+                self.reused += 1
+                record(
+                    "file_reused",
+                    "Identical to a file processed earlier, reusing outputs from {source}",
+                    "DEBUG",
+                    path=input_file,
+                    source=first_dir,
+                )
+                if self.hardlink:
+                    copy_outputs(first_dir, output_dir, outputs, hardlink=True)
+                else:
+                    write_outputs(output_dir, outputs)
+            else:
+                outputs = self.explode(data, input_file.name, str(input_file))
+                write_outputs(output_dir, outputs)
+                seen[digest] = (outputs, output_dir)
+        finally:
+            self._release(bucket)
+        return outputs
+
+    def _release(self, bucket: tuple[int, str]) -> None:
+        """Count a processed file and free the bucket's outputs after its last member."""
+        self._pending[bucket] -= 1
+        if self._pending[bucket] <= 0:
+            del self._pending[bucket]
+            self._memo.pop(bucket, None)
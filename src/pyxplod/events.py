@@ -0,0 +1,132 @@
+# this_file: src/pyxplod/events.py
+"""Structured, rate-limited pipeline events.
+
+Hot-path code reports per-file and per-definition activity through `record()`
+instead of calling the logger directly. By default every event is logged as
+before. While an `EventCounter` is active in aggregating mode, events are only
+counted and a one-line summary is logged every few seconds, which keeps console
+rendering out of the processing loop. Messages are brace templates formatted by
+loguru only when the record is actually emitted, so disabled levels cost no
+string formatting. An optional JSON-lines event log receives every event.
+
+Worker processes collect their events with `collecting()` instead, and the
+coordinating process passes them to `replay()`, so parallel runs log, count and
+journal the same events as serial ones.
+"""
+
+import json
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TextIO
+
+from loguru import logger
+
+DEFAULT_SUMMARY_INTERVAL = 5.0
+# Levels that are always logged, even while events are aggregated
+ALWAYS_LOGGED_LEVELS = frozenset({"WARNING", "ERROR", "CRITICAL"})
+
+
+class EventCounter:
+    """Aggregate events into counters with periodic summaries and an optional JSON-lines log."""
+
+    def __init__(
+        self,
+        *,
+        aggregate: bool = True,
+        event_log: Path | None = None,
+        interval: float = DEFAULT_SUMMARY_INTERVAL,
+    ) -> None:
+        self.aggregate = aggregate
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self._next_report = time.monotonic() + interval
+        self._log: TextIO | None = event_log.open("a", encoding="utf-8") if event_log else None
+
+    def record(self, event: str, fields: dict) -> None:
+        """Count an event, append it to the event log and report a summary when due."""
+        self.counts[event] += 1
+        if self._log is not None:
+            self._log.write(json.dumps({"time": time.time(), "event": event, **fields}, default=str) + "\n")
+        if self.aggregate and self.interval > 0:
+            now = time.monotonic()
+            if now >= self._next_report:
+                self._next_report = now + self.interval
+                logger.info("Progress: {}", self.summary())
+
+    def summary(self) -> str:
+        """Return a one-line summary of the event counts."""
+        return ", ".join(f"{event}={count}" for event, count in sorted(self.counts.items()))
+
+    def close(self) -> None:
+        """Flush and close the event log."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+# (event, message, level, fields) of a recorded event
+Event = tuple[str, str, str, dict]
+
+_counter: EventCounter | None = None
+_collected: list[Event] | None = None
+
+
+def start(counter: EventCounter) -> None:
+    """Route events through counter until `stop()` is called."""
+    global _counter
+    _counter = counter
+
+
+def stop() -> EventCounter | None:
+    """Stop routing events, close the active counter and return it."""
+    global _counter
+    counter, _counter = _counter, None
+    if counter is not None:
+        counter.close()
+    return counter
+
+
+def detach() -> None:
+    """Stop routing events without closing the counter, e.g. in forked worker processes."""
+    global _counter
+    _counter = None
+
+
+@contextmanager
+def collecting() -> Iterator[list[Event]]:
+    """Collect events into a list instead of logging or counting them, e.g. in worker processes."""
+    global _collected
+    previous, _collected = _collected, []
+    try:
+        yield _collected
+    finally:
+        _collected = previous
+
+
+def replay(collected: list[Event]) -> None:
+    """Record events collected elsewhere, e.g. by a worker process."""
+    for event, message, level, fields in collected:
+        record(event, message, level, **fields)
+
+
+def record(event: str, message: str, level: str = "INFO", **fields: object) -> None:
+    """Report a pipeline event.
+
+    Args:
+        event: Event name used as the counter key, e.g. 'file_started'
+        message: Brace template for the log line, formatted with fields only when emitted
+        level: Log level of the line
+        **fields: Structured event data
+    """
+    if _collected is not None:
+        _collected.append((event, message, level, fields))
+        return
+    counter = _counter
+    if counter is not None:
+        counter.record(event, fields)
+        if counter.aggregate and level not in ALWAYS_LOGGED_LEVELS:
+            return
+    logger.opt(depth=1).log(level, message, **fields)
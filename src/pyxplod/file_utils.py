@@ -7,37 +7,33 @@ from pathlib import Path
 # For Python 3.9+, list, set, tuple are standard types for hinting.
 from loguru import logger
 
-from pyxplod.ast_utils import analyze_name_usage, filter_imports_for_names
-from pyxplod.utils import to_snake_case
+from pyxplod.ast_utils import analyze_name_usage, filter_imports_for_names, share_imports
+from pyxplod.events import record
+from pyxplod.naming import NameAllocator, allocate_filename, to_snake_case
 
 
-def generate_filename(base_name: str, def_name: str, existing_files: set) -> str:  # def_type removed
+def generate_filename(base_name: str, def_name: str, existing_files: set | NameAllocator) -> str:
     """Generate a unique filename for the extracted definition.
 
-    Handles deduplication by appending numbers if necessary.
-    The def_type argument was previously unused.
+    Handles deduplication by appending numbers if necessary. Pass a NameAllocator
+    instead of a set of taken filenames to deduplicate in O(1) per definition.
     """
-    snake_name = to_snake_case(def_name)
-    filename = f"{base_name}_{snake_name}.py"
+    if isinstance(existing_files, NameAllocator):
+        return existing_files.for_definition(def_name, f"{base_name}_")
+    return allocate_filename(f"{base_name}_{to_snake_case(def_name)}", existing_files, {})
 
-    # Handle deduplication
-    if filename in existing_files:
-        counter = 2
-        while f"{base_name}_{snake_name}_{counter}.py" in existing_files:
-            counter += 1
-        filename = f"{base_name}_{snake_name}_{counter}.py"
 
-    existing_files.add(filename)
-    return filename
-
-
-def write_extracted_file(
-    output_path: Path,
+def render_extracted_file(
     imports: list[ast.stmt],
     definition: ast.stmt,
     module_variables: list[tuple[ast.stmt, str]] | None = None,
-) -> None:
-    """Write the extracted definition to a new file with necessary imports and module variables."""
+    shared_imports_module: str | None = None,
+) -> str:
+    """Generate the code of an extracted file with necessary imports and module variables.
+
+    If shared_imports_module is given, the needed imports are re-imported from that
+    module (e.g. '._imports') instead of being repeated.
+    """
     if module_variables is None:
         module_variables = []
 
@@ -46,30 +42,60 @@ def write_extracted_file(
 
     # Find which module variables are needed by this definition
     needed_variables = []
-    # variable_names = set() # This variable was unused
     for var_node, var_name in module_variables:
         if var_name in used_names:
             needed_variables.append(var_node)
-            # variable_names.add(var_name) # This variable was unused
             # Also analyze names used in the variable assignment itself
             var_used_names = analyze_name_usage(var_node)
             used_names.update(var_used_names)
-            logger.debug(f"Including module variable '{var_name}' in {output_path.name}")
+            record("variable_included", "Including module variable '{name}'", "DEBUG", name=var_name)
 
     # Filter imports to include those used by both definition and needed variables
     filtered_imports = filter_imports_for_names(imports, used_names)
+    if shared_imports_module is not None:
+        filtered_imports = share_imports(filtered_imports, shared_imports_module)
 
     # Create a new module with filtered imports, needed variables, and the definition
     # Order: imports first, then module variables, then definition
     new_module = ast.Module(body=[*filtered_imports, *needed_variables, definition], type_ignores=[])
 
     # Generate Python code from AST
-    code = ast.unparse(new_module)
+    return ast.unparse(new_module)
+
+
+def write_extracted_file(
+    output_path: Path,
+    imports: list[ast.stmt],
+    definition: ast.stmt,
+    module_variables: list[tuple[ast.stmt, str]] | None = None,
+) -> None:
+    """Write the extracted definition to a new file with necessary imports and module variables."""
+    code = render_extracted_file(imports, definition, module_variables)
 
     # Write to file with UTF-8 encoding
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(code, encoding="utf-8")
-    logger.debug(f"Created file: {output_path} with {len(filtered_imports)} imports, {len(needed_variables)} variables")
+    record("file_written", "Created file: {path}", "DEBUG", path=output_path)
+
+
+def write_outputs(output_dir: Path, outputs: dict[str, str | bytes]) -> None:
+    """Write generated files to disk.
+
+    Args:
+        output_dir: Directory the exploded module is written to
+        outputs: Mapping of paths relative to output_dir to generated code, or to the
+            raw bytes of copied modules, which are written unchanged
+    """
+    for relative_name, code in outputs.items():
+        output_file = output_dir / relative_name
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        # A previous --hardlink run may have linked this file to other outputs; never write through the link
+        output_file.unlink(missing_ok=True)
+        if isinstance(code, bytes):
+            output_file.write_bytes(code)
+        else:
+            output_file.write_text(code, encoding="utf-8")
+        record("file_written", "Created file: {path}", "DEBUG", path=output_file)
 
 
 def find_python_files(directory: Path) -> list[Path]:
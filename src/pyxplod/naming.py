@@ -0,0 +1,67 @@
+# this_file: src/pyxplod/naming.py
+"""Naming of extracted files, shared by all explosion methods.
+
+Every extracted definition needs a snake_case filename that is unique within its
+output directory. The case conversion uses precompiled patterns and is memoized,
+since the same names (`__init__`, `main`, `Config`, ...) recur across a project,
+and uniqueness is tracked with a counter per base name, so the n-th duplicate of
+a name costs O(1) instead of probing n - 1 taken suffixes.
+"""
+
+import re
+from functools import lru_cache
+
+SNAKE_CASE_CACHE_SIZE = 65536
+# Uppercase letter starting a capitalized word, e.g. 'Case' in 'CamelCase'
+_WORD_START_PATTERN = re.compile(r"(.)([A-Z][a-z]+)")
+# Uppercase letter after a lowercase letter or digit, e.g. 'R' in 'getHTTPResponse'
+_CASE_CHANGE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+
+
+@lru_cache(maxsize=SNAKE_CASE_CACHE_SIZE)
+def to_snake_case(name: str) -> str:
+    """Convert a name to snake_case format.
+
+    Handles CamelCase, pascalCase, and already snake_case names.
+    """
+    return _CASE_CHANGE_PATTERN.sub(r"\1_\2", _WORD_START_PATTERN.sub(r"\1_\2", name)).lower()
+
+
+def allocate_filename(stem: str, taken: set[str], counters: dict[str, int]) -> str:
+    """Return a unique '<stem>.py' filename, appending '_2', '_3', ... to duplicates.
+
+    Args:
+        stem: Desired filename without the .py extension
+        taken: Filenames already in use; the returned filename is added to it
+        counters: Next suffix to try per stem, updated in place
+    """
+    filename = f"{stem}.py"
+    if filename in taken:
+        suffix = counters.get(stem, 2)
+        # Only loops when a suffixed name was taken by another definition, e.g. 'foo_2'
+        while f"{stem}_{suffix}.py" in taken:
+            suffix += 1
+        counters[stem] = suffix + 1
+        filename = f"{stem}_{suffix}.py"
+    taken.add(filename)
+    return filename
+
+
+class NameAllocator:
+    """Unique extracted filenames within one output directory."""
+
+    def __init__(self) -> None:
+        self.taken: set[str] = set()
+        self.counters: dict[str, int] = {}
+
+    def reserve(self, filename: str) -> None:
+        """Mark a filename as used, e.g. a generated module like '_imports.py'."""
+        self.taken.add(filename)
+
+    def allocate(self, stem: str) -> str:
+        """Return a unique filename for stem, see allocate_filename."""
+        return allocate_filename(stem, self.taken, self.counters)
+
+    def for_definition(self, def_name: str, prefix: str = "") -> str:
+        """Return a unique filename for a definition, e.g. 'module_my_class.py' for prefix 'module_'."""
+        return self.allocate(f"{prefix}{to_snake_case(def_name)}")
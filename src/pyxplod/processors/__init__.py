@@ -1,4 +1,5 @@
 # this_file: src/pyxplod/processors/__init__.py
 
-from pyxplod.processors.process_dirs_method import process_python_file_dirs
-from pyxplod.processors.process_file_method import process_python_file
+from pyxplod.processors.process_chunks_method import explode_source_chunks
+from pyxplod.processors.process_dirs_method import explode_source_dirs, process_python_file_dirs
+from pyxplod.processors.process_file_method import explode_source, process_python_file
@@ -0,0 +1,280 @@
+# this_file: src/pyxplod/processors/process_chunks_method.py
+"""Processing function for the 'chunks' explosion method.
+
+Instead of one file per definition, consecutive definitions are packed into
+chunk modules whose estimated size stays under a byte or token budget, which
+suits tools that feed code into fixed-size context windows. A chunk's size
+counts its definitions plus the imports and module variables they need, each
+counted once per chunk.
+
+Packing is a single next-fit pass in source order, so definitions keep their
+dependency order and the number of chunks is minimal for contiguous chunks.
+A chunk holds its definitions and needed module variables in source order.
+Names from earlier chunks are imported at the top; a chunk never imports a later
+chunk, so importing chunks cannot hit a partially initialized module. Names
+from later chunks can only be used at call time, and are bound into the chunk
+by `__init__.py` once every chunk has loaded, together with module variables
+that depend on them.
+"""
+
+import ast
+import math
+from pathlib import Path
+
+from loguru import logger
+
+from pyxplod.ast_utils import (
+    analyze_name_usage,
+    extract_imports,
+    filter_imports_for_names,
+    find_definitions,
+    find_module_variables,
+)
+from pyxplod.events import record
+from pyxplod.processors.process_dirs_method import is_special_file
+from pyxplod.processors.process_file_method import explode_source
+from pyxplod.reader import detach
+
+DEFAULT_CHUNK_BUDGET = 8000
+CHUNK_UNITS = ("bytes", "tokens")
+# Rough number of bytes per LLM token in source code, used for 'tokens' budgets
+BYTES_PER_TOKEN = 4
+
+
+def measure(code: str, unit: str) -> int:
+    """Return the size of code in the budget unit."""
+    size = len(code.encode("utf-8"))
+    return math.ceil(size / BYTES_PER_TOKEN) if unit == "tokens" else size
+
+
+def pack_chunks(costs: list[int], needs: list[set[str]], shared_costs: dict[str, int], budget: int) -> list[list[int]]:
+    """Pack items into consecutive chunks whose total cost stays within budget.
+
+    Args:
+        costs: Own cost of each item, in order
+        needs: Names of shared items (imports, variables) each item requires
+        shared_costs: Cost of each shared item, counted once per chunk needing it
+        budget: Maximum cost of a chunk; an item exceeding it alone gets its own chunk
+
+    Returns:
+        Lists of item indices, one per chunk, in order.
+    """
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    size = 0
+    seen: set[str] = set()
+    for index, (cost, needed) in enumerate(zip(costs, needs, strict=True)):
+        extra = cost + sum(shared_costs[name] for name in needed - seen)
+        if current and size + extra > budget:
+            chunks.append(current)
+            current, size, seen = [], 0, set()
+            extra = cost + sum(shared_costs[name] for name in needed)
+        current.append(index)
+        size += extra
+        seen |= needed
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def explode_source_chunks(
+    content: str | bytes,
+    filename: str,
+    source_name: str = "<unknown>",
+    part: tuple[int, int] = (0, 1),
+    *,
+    chunk_budget: int = DEFAULT_CHUNK_BUDGET,
+    chunk_unit: str = "bytes",
+) -> dict[str, str | bytes]:
+    """Explode module source using the 'chunks' method without touching the filesystem.
+
+    Args:
+        content: Source code of the module, as text or as raw bytes whose PEP 263 encoding is honoured
+        filename: Name of the module file, e.g. 'helpers.py'
+        source_name: Name used in error messages and logs
+        part: (index, count) to generate only every count-th chunk starting at index;
+            part 0 also produces __init__.py (see explode_source)
+        chunk_budget: Maximum estimated size of a chunk module
+        chunk_unit: Unit of chunk_budget - 'bytes' or 'tokens' (estimated from bytes)
+
+    Returns:
+        Mapping of output paths, relative to the directory containing the module,
+        to their generated code. Regular modules become a package named after the
+        module holding chunk_NNN.py files and an __init__.py; special files use the
+        files method.
+
+    Raises:
+        SyntaxError: If the source cannot be parsed.
+        ValueError: If chunk_unit is unknown.
+    """
+    if chunk_unit not in CHUNK_UNITS:
+        msg = f"Invalid chunk unit '{chunk_unit}'. Must be one of {', '.join(CHUNK_UNITS)}."
+        raise ValueError(msg)
+
+    if is_special_file(filename):
+        logger.debug("Special file detected, using files method for: {}", filename)
+        return explode_source(content, filename, source_name, part)
+
+    dir_name = Path(filename).stem
+    tree = ast.parse(content, filename=source_name)
+
+    imports = extract_imports(tree)
+    definitions = find_definitions(tree)
+    module_variables = find_module_variables(tree)
+
+    if not definitions:
+        record(
+            "file_copied",
+            "No definitions found, created __init__.py with original content for: {path}",
+            "DEBUG",
+            path=source_name,
+        )
+        return {f"{dir_name}/__init__.py": detach(content)} if part[0] == 0 else {}
+
+    # Shared items a chunk may need, with their cost counted once per chunk
+    shared_costs: dict[str, int] = {}
+    for imp in imports:
+        for alias in imp.names:
+            name = (alias.asname or alias.name).split(".")[0]
+            single = filter_imports_for_names([imp], {name})
+            shared_costs.setdefault(name, measure(ast.unparse(single[0]), chunk_unit) + 1)
+    variable_names: dict[str, set[str]] = {}
+    # Names bound by each variable assignment, e.g. both a and b for 'a = b = 1'
+    variable_names_of: dict[ast.stmt, set[str]] = {}
+    for var_node, var_name in module_variables:
+        shared_costs[var_name] = measure(ast.unparse(var_node), chunk_unit) + 1
+        variable_names[var_name] = analyze_name_usage(var_node)
+        variable_names_of.setdefault(var_node, set()).add(var_name)
+
+    position = {node: index for index, node in enumerate(tree.body)}
+    codes: list[str] = []
+    costs: list[int] = []
+    needs: list[set[str]] = []
+    used_names: list[set[str]] = []
+    for def_node, _def_type, _def_name in definitions:
+        code = ast.unparse(def_node)
+        used = analyze_name_usage(def_node)
+        # Names used by needed variables are needed too, as in render_extracted_file
+        for var_name in used & variable_names.keys():
+            used |= variable_names[var_name]
+        codes.append(code)
+        costs.append(measure(code, chunk_unit) + 2)
+        needs.append(used & shared_costs.keys())
+        used_names.append(used)
+
+    chunks = pack_chunks(costs, needs, shared_costs, chunk_budget)
+    width = max(3, len(str(len(chunks))))
+    chunk_modules = [f"chunk_{number:0{width}d}" for number in range(1, len(chunks) + 1)]
+    defined_in = {}
+    for chunk_index, members in enumerate(chunks):
+        for member in members:
+            defined_in[definitions[member][2]] = chunk_index
+
+    # Per chunk: its needed variables in source order, and the names __init__.py binds into it
+    chunk_variables: list[list[ast.stmt]] = []
+    late_bindings: list[set[str]] = []
+    for chunk_index, members in enumerate(chunks):
+        used: set[str] = set().union(*(used_names[member] for member in members))
+        needed_variables = list(dict.fromkeys(var_node for var_node, var_name in module_variables if var_name in used))
+        late = {name for name in used if defined_in.get(name, chunk_index) > chunk_index}
+        # Variables depending on later chunks, directly or through other variables, are assigned late too
+        kept: list[ast.stmt] = []
+        for var_node in needed_variables:
+            names = variable_names_of[var_node]
+            if variable_names[next(iter(names))] & late:
+                late |= names
+            else:
+                kept.append(var_node)
+        chunk_variables.append(kept)
+        late_bindings.append(late)
+
+    outputs: dict[str, str | bytes] = {}
+    part_index, part_count = part
+    for chunk_index, members in enumerate(chunks):
+        if chunk_index % part_count != part_index:
+            continue
+        if len(members) == 1 and costs[members[0]] > chunk_budget:
+            record(
+                "chunk_oversized",
+                "Definition {name} in {path} exceeds the chunk budget on its own",
+                "DEBUG",
+                name=definitions[members[0]][2],
+                path=source_name,
+            )
+        used = set().union(*(used_names[member] for member in members))
+        earlier: dict[int, list[str]] = {}
+        for name in sorted(used):
+            other = defined_in.get(name)
+            if other is not None and other < chunk_index:
+                earlier.setdefault(other, []).append(name)
+
+        header: list[ast.stmt] = [
+            *filter_imports_for_names(imports, used),
+            *(
+                ast.ImportFrom(module=chunk_modules[other], names=[ast.alias(name=n) for n in names], level=1)
+                for other, names in sorted(earlier.items())
+            ),
+        ]
+        parts = [ast.unparse(ast.Module(body=header, type_ignores=[]))] if header else []
+        # Definitions and variables in source order, so variables follow the definitions they reference
+        body = [(position[definitions[member][0]], codes[member]) for member in members]
+        body.extend((position[var_node], ast.unparse(var_node)) for var_node in chunk_variables[chunk_index])
+        parts.extend(code for _position, code in sorted(body))
+        outputs[f"{dir_name}/{chunk_modules[chunk_index]}.py"] = "\n\n".join(parts)
+
+    if part_index != 0:
+        return outputs
+
+    # __init__.py re-exports every definition from its chunk and keeps the remaining code
+    definition_nodes = {d[0] for d in definitions}
+    import_nodes = set(imports)
+    chunk_imports = [
+        ast.ImportFrom(
+            module=chunk_modules[chunk_index],
+            names=[ast.alias(name=definitions[member][2]) for member in members],
+            level=1,
+        )
+        for chunk_index, members in enumerate(chunks)
+    ]
+    # Chunks that need names from later chunks, as private aliases of the chunk modules
+    late_chunks = [chunk_index for chunk_index, late in enumerate(late_bindings) if late]
+    chunk_aliases = [
+        ast.ImportFrom(
+            module=None,
+            names=[ast.alias(name=chunk_modules[i], asname=f"_{chunk_modules[i]}") for i in late_chunks],
+            level=1,
+        )
+    ]
+
+    def bind_late(names: set[str]) -> list[ast.stmt]:
+        """Assign names of this namespace into the chunks that need them late."""
+        return [
+            ast.parse(f"_{chunk_modules[chunk_index]}.{name} = {name}").body[0]
+            for chunk_index in late_chunks
+            for name in sorted(late_bindings[chunk_index] & names)
+        ]
+
+    # Definitions are bound once all chunks have loaded, variables right after their assignment
+    definition_names = {d[2] for d in definitions}
+    body: list[ast.stmt] = [
+        *imports,
+        *chunk_imports,
+        *(chunk_aliases if late_chunks else []),
+        *bind_late(definition_names),
+    ]
+    for node in tree.body:
+        if node not in definition_nodes and node not in import_nodes:
+            body.append(node)
+            body.extend(bind_late(variable_names_of.get(node, set())))
+    init_tree = ast.Module(body=body, type_ignores=tree.type_ignores)
+    outputs[f"{dir_name}/__init__.py"] = ast.unparse(init_tree)
+    record(
+        "file_exploded",
+        "Packed {definitions} definitions from {path} into {chunks} chunks in {package}",
+        "DEBUG",
+        path=source_name,
+        definitions=len(definitions),
+        chunks=len(chunks),
+        package=dir_name,
+    )
+    return outputs
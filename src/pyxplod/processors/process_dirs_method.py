@@ -6,47 +6,73 @@ from pathlib import Path
 
 from loguru import logger
 
-from pyxplod.ast_utils import create_import_statement, extract_imports, find_definitions, find_module_variables
-from pyxplod.file_utils import write_extracted_file
-from pyxplod.processors.process_file_method import process_python_file  # Import the other processing function
-from pyxplod.utils import to_snake_case
-
-
-def process_python_file_dirs(input_file: Path, output_base: Path, input_root: Path) -> None:
-    """Process a single Python file using the 'dirs' method.
-
-    Creates a directory for each .py file and extracts definitions into separate files
-    within that directory, with an __init__.py containing imports and module-level code.
-
-    Special files like __init__.py, __main__.py, __version__.py are processed using
-    the files method instead of creating directories.
+from pyxplod.ast_utils import (
+    analyze_name_usage,
+    create_import_statement,
+    create_lazy_loader,
+    defines_all,
+    extract_imports,
+    find_definitions,
+    find_module_variables,
+    is_shareable_import,
+    public_names,
+    share_imports,
+)
+from pyxplod.events import record
+from pyxplod.file_utils import render_extracted_file, write_outputs
+from pyxplod.naming import NameAllocator
+from pyxplod.processors.process_file_method import explode_source  # Import the other processing function
+from pyxplod.reader import detach, open_source
+
+SHARED_IMPORTS_MODULE = "_imports"
+# Module attributes the lazy loader defines; modules defining their own keep an eager __init__.py
+LAZY_LOADER_HOOKS = frozenset({"__getattr__", "__dir__"})
+
+
+def is_special_file(filename: str) -> bool:
+    """Check whether a file is a special Python file like __init__.py or __main__.py."""
+    return filename.startswith("__") and filename.endswith("__.py")
+
+
+def explode_source_dirs(
+    content: str | bytes,
+    filename: str,
+    source_name: str = "<unknown>",
+    part: tuple[int, int] = (0, 1),
+    *,
+    shared_imports: bool = False,
+    lazy_init: bool = False,
+) -> dict[str, str | bytes]:
+    """Explode module source using the 'dirs' method without touching the filesystem.
+
+    Args:
+        content: Source code of the module, as text or as raw bytes whose PEP 263 encoding is honoured
+        filename: Name of the module file, e.g. 'helpers.py'
+        source_name: Name used in error messages and logs
+        part: (index, count) to generate only every count-th extracted definition starting
+            at index; part 0 also produces __init__.py (see explode_source)
+        shared_imports: Emit the module's imports once into a _imports.py in the package
+            and let the extracted files and __init__.py import the names they need from it
+        lazy_init: Generate an __init__.py whose module __getattr__ imports each extracted
+            submodule on first attribute access instead of importing all of them eagerly;
+            ignored, with a warning, for modules defining their own __getattr__ or __dir__
+
+    Returns:
+        Mapping of output paths, relative to the directory containing the module,
+        to their generated code. For regular modules all paths live in a package
+        directory named after the module; special files use the files method.
+
+    Raises:
+        SyntaxError: If the source cannot be parsed.
     """
-    logger.info(f"Processing (dirs): {input_file}")
-
     # Check if this is a special Python file (starts and ends with __)
-    filename = input_file.name
-    if filename.startswith("__") and filename.endswith("__.py"):
-        logger.debug(f"Special file detected, using files method for: {filename}")
-        process_python_file(input_file, output_base, input_root)  # Recursive call to self.process_python_file
-        return
+    if is_special_file(filename):
+        logger.debug("Special file detected, using files method for: {}", filename)
+        return explode_source(content, filename, source_name, part)
 
-    # Calculate relative path structure
-    relative_path = input_file.relative_to(input_root)
     # Create directory name from filename (without .py extension)
-    dir_name = relative_path.stem
-    output_dir = output_base / relative_path.parent / dir_name
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Read and parse the file
-    try:
-        content = input_file.read_text(encoding="utf-8")
-        tree = ast.parse(content, filename=str(input_file))
-    except SyntaxError as e:
-        logger.error(f"Syntax error in {input_file}: {e}")
-        return
-    except Exception as e:
-        logger.error(f"Error reading {input_file}: {e}")
-        return
+    dir_name = Path(filename).stem
+    tree = ast.parse(content, filename=source_name)
 
     # Extract imports, definitions, and module variables
     imports = extract_imports(tree)
@@ -55,58 +81,130 @@ def process_python_file_dirs(input_file: Path, output_base: Path, input_root: Pa
 
     if not definitions:
         # No definitions to extract, create __init__.py with original content
-        init_file = output_dir / "__init__.py"
-        init_file.write_text(content, encoding="utf-8")
-        logger.debug(f"No definitions found, created __init__.py with original content for: {input_file}")
-        return
+        record(
+            "file_copied",
+            "No definitions found, created __init__.py with original content for: {path}",
+            "DEBUG",
+            path=source_name,
+        )
+        return {f"{dir_name}/__init__.py": detach(content)} if part[0] == 0 else {}
+
+    outputs: dict[str, str | bytes] = {}
 
     # Track created files for deduplication
-    existing_files: set[str] = set()
+    existing_files = NameAllocator()
+
+    shared_module = None
+    if shared_imports and any(is_shareable_import(imp) for imp in imports):
+        shared_module = f".{SHARED_IMPORTS_MODULE}"
+        existing_files.reserve(f"{SHARED_IMPORTS_MODULE}.py")
+        if part[0] == 0:
+            shared_body = [imp for imp in imports if is_shareable_import(imp)]
+            outputs[f"{dir_name}/{SHARED_IMPORTS_MODULE}.py"] = ast.unparse(
+                ast.Module(body=shared_body, type_ignores=[])
+            )
 
     # Process each definition
     new_imports_for_init = []
+    lazy_submodules: dict[str, str] = {}
 
     current_remaining_body_for_init = []
-    {d[0] for d in definitions}
+    definition_nodes = {d[0]: d[2] for d in definitions}
     import_nodes = set(imports)
 
+    part_index, part_count = part
+    index = 0
     for node in tree.body:
-        is_definition = False
-        for def_node, _def_type, _def_name in definitions:
-            if node is def_node:
-                is_definition = True
-                def_name = _def_name
-
-                # Generate filename without prefix for dirs method
-                snake_name = to_snake_case(def_name)
-                fn = f"{snake_name}.py"
-
-                # Handle deduplication
-                if fn in existing_files:
-                    counter = 2
-                    while f"{snake_name}_{counter}.py" in existing_files:
-                        counter += 1
-                    fn = f"{snake_name}_{counter}.py"
-                existing_files.add(fn)
-
-                # Write extracted file
-                extracted_path = output_dir / fn
-                write_extracted_file(extracted_path, imports.copy(), def_node, module_variables)
-
-                # Create import statement for __init__.py
-                import_stmt = create_import_statement(f".{fn[:-3]}", def_name)
-                new_imports_for_init.append(import_stmt)
-                break
-
-        if not is_definition and node not in import_nodes:
+        def_name = definition_nodes.get(node)
+        if def_name is not None:
+            # Generate filename without prefix for dirs method
+            fn = existing_files.for_definition(def_name)
+
+            if index % part_count == part_index:
+                outputs[f"{dir_name}/{fn}"] = render_extracted_file(
+                    imports.copy(), node, module_variables, shared_imports_module=shared_module
+                )
+            index += 1
+
+            # Create import statement for __init__.py
+            import_stmt = create_import_statement(f".{fn[:-3]}", def_name)
+            new_imports_for_init.append(import_stmt)
+            lazy_submodules[def_name] = f".{fn[:-3]}"
+        elif node not in import_nodes:
             current_remaining_body_for_init.append(node)
 
+    if part_index != 0:
+        return outputs
+
     # Create __init__.py with original imports, new imports for extracted defs, and remaining code
-    init_body = imports + new_imports_for_init + current_remaining_body_for_init
+    init_imports = share_imports(imports, shared_module) if shared_module else imports
+    if lazy_init and (
+        hooks := sorted(LAZY_LOADER_HOOKS & ({d[2] for d in definitions} | {name for _node, name in module_variables}))
+    ):
+        record(
+            "lazy_init_skipped",
+            "{path} defines {hooks}, keeping an eager __init__.py instead of a lazy loader",
+            "WARNING",
+            path=source_name,
+            hooks=", ".join(hooks),
+        )
+    elif lazy_init:
+        # Definitions used by the remaining module-level code must still be imported eagerly
+        used_by_init: set[str] = set()
+        for node in current_remaining_body_for_init:
+            used_by_init.update(analyze_name_usage(node))
+        # Star imports only see bound names, so list what an eager __init__.py would export
+        all_names = None
+        if not defines_all(tree):
+            eager_init = ast.Module(
+                body=init_imports + new_imports_for_init + current_remaining_body_for_init, type_ignores=[]
+            )
+            all_names = sorted(public_names(eager_init))
+        new_imports_for_init = [
+            *create_lazy_loader(lazy_submodules, all_names),
+            *(stmt for stmt in new_imports_for_init if stmt.names[0].name in used_by_init),
+        ]
+    init_body = init_imports + new_imports_for_init + current_remaining_body_for_init
     init_tree = ast.Module(body=init_body, type_ignores=tree.type_ignores)
+    outputs[f"{dir_name}/__init__.py"] = ast.unparse(init_tree)
+    record(
+        "file_exploded",
+        "Extracted {definitions} definitions from {path} into {package}",
+        "DEBUG",
+        path=source_name,
+        definitions=len(definitions),
+        package=dir_name,
+    )
+    return outputs
+
+
+def process_python_file_dirs(input_file: Path, output_base: Path, input_root: Path) -> None:
+    """Process a single Python file using the 'dirs' method.
+
+    Creates a directory for each .py file and extracts definitions into separate files
+    within that directory, with an __init__.py containing imports and module-level code.
+
+    Special files like __init__.py, __main__.py, __version__.py are processed using
+    the files method instead of creating directories.
+    """
+    record("file_started", "Processing (dirs): {path}", path=input_file)
+
+    # Calculate relative path structure
+    relative_path = input_file.relative_to(input_root)
+    output_dir = output_base / relative_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Read and explode the file
+    try:
+        with open_source(input_file) as content:
+            outputs = explode_source_dirs(content, input_file.name, str(input_file))
+    except SyntaxError as e:
+        logger.error(f"Syntax error in {input_file}: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Error reading {input_file}: {e}")
+        return
 
-    # Write __init__.py
-    init_file = output_dir / "__init__.py"
-    init_file.write_text(ast.unparse(init_tree), encoding="utf-8")
-    logger.info(f"Created package: {output_dir}")
-    logger.debug(f"Extracted {len(definitions)} definitions from {input_file} into {output_dir}")
+    write_outputs(output_dir, outputs)
+    if not is_special_file(input_file.name):
+        record("file_finished", "Created package: {path}", path=output_dir / relative_path.stem)
@@ -7,28 +7,33 @@ from pathlib import Path
 from loguru import logger
 
 from pyxplod.ast_utils import create_import_statement, extract_imports, find_definitions, find_module_variables
-from pyxplod.file_utils import generate_filename, write_extracted_file
-
-
-def process_python_file(input_file: Path, output_base: Path, input_root: Path) -> None:
-    """Process a single Python file, extracting definitions and creating new files."""
-    logger.info(f"Processing: {input_file}")
-
-    # Calculate relative path structure
-    relative_path = input_file.relative_to(input_root)
-    output_dir = output_base / relative_path.parent
-    output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Read and parse the file
-    try:
-        content = input_file.read_text(encoding="utf-8")
-        tree = ast.parse(content, filename=str(input_file))
-    except SyntaxError as e:
-        logger.error(f"Syntax error in {input_file}: {e}")
-        return
-    except Exception as e:
-        logger.error(f"Error reading {input_file}: {e}")
-        return
+from pyxplod.events import record
+from pyxplod.file_utils import generate_filename, render_extracted_file, write_outputs
+from pyxplod.naming import NameAllocator
+from pyxplod.reader import detach, open_source
+
+
+def explode_source(
+    content: str | bytes, filename: str, source_name: str = "<unknown>", part: tuple[int, int] = (0, 1)
+) -> dict[str, str | bytes]:
+    """Explode module source using the 'files' method without touching the filesystem.
+
+    Args:
+        content: Source code of the module, as text or as raw bytes whose PEP 263 encoding is honoured
+        filename: Name of the module file, e.g. 'helpers.py'
+        source_name: Name used in error messages and logs
+        part: (index, count) to generate only every count-th extracted definition starting
+            at index, so a giant module can be split across workers. Part 0 also produces
+            the exploded module itself.
+
+    Returns:
+        Mapping of output paths, relative to the directory the module is exploded into,
+        to their generated code. The exploded module itself comes last.
+
+    Raises:
+        SyntaxError: If the source cannot be parsed.
+    """
+    tree = ast.parse(content, filename=source_name)
 
     # Extract imports, definitions, and module variables
     imports = extract_imports(tree)
@@ -37,32 +42,31 @@ def process_python_file(input_file: Path, output_base: Path, input_root: Path) -
 
     if not definitions:
         # No definitions to extract, just copy the file
-        output_file = output_base / relative_path
-        output_file.write_text(content, encoding="utf-8")
-        logger.debug(f"No definitions found, copied: {input_file}")
-        return
+        record("file_copied", "No definitions found, copied: {path}", "DEBUG", path=source_name)
+        return {filename: detach(content)} if part[0] == 0 else {}
+
+    outputs: dict[str, str | bytes] = {}
 
     # Track created files for deduplication
-    existing_files: set[str] = set()
-    base_name = input_file.stem
+    existing_files = NameAllocator()
+    base_name = Path(filename).stem
 
     # Process each definition
     new_imports = []
 
-    for node in tree.body:
-        for def_node, _def_type, def_name in definitions:
-            if node is def_node:
-                # Generate filename for extracted definition
-                filename = generate_filename(base_name, def_name, existing_files)
+    part_index, part_count = part
+    for index, (def_node, _def_type, def_name) in enumerate(definitions):
+        # Generate filename for extracted definition
+        extracted_name = generate_filename(base_name, def_name, existing_files)
+        if index % part_count == part_index:
+            outputs[extracted_name] = render_extracted_file(imports.copy(), def_node, module_variables)
 
-                # Write extracted file
-                extracted_path = output_dir / filename
-                write_extracted_file(extracted_path, imports.copy(), def_node, module_variables)
+        # Create import statement
+        import_stmt = create_import_statement(f".{extracted_name[:-3]}", def_name)
+        new_imports.append(import_stmt)
 
-                # Create import statement
-                import_stmt = create_import_statement(f".{filename[:-3]}", def_name)
-                new_imports.append(import_stmt)
-                break
+    if part_index != 0:
+        return outputs
 
     current_remaining_body = []
     definition_nodes = {d[0] for d in definitions}
@@ -73,9 +77,36 @@ def process_python_file(input_file: Path, output_base: Path, input_root: Path) -
             current_remaining_body.append(node)
 
     modified_tree = ast.Module(body=imports + new_imports + current_remaining_body, type_ignores=tree.type_ignores)
+    outputs[filename] = ast.unparse(modified_tree)
+    record(
+        "file_exploded",
+        "Extracted {definitions} definitions from {path}",
+        "DEBUG",
+        path=source_name,
+        definitions=len(definitions),
+    )
+    return outputs
+
+
+def process_python_file(input_file: Path, output_base: Path, input_root: Path) -> None:
+    """Process a single Python file, extracting definitions and creating new files."""
+    record("file_started", "Processing: {path}", path=input_file)
+
+    # Calculate relative path structure
+    relative_path = input_file.relative_to(input_root)
+    output_dir = output_base / relative_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Read and explode the file
+    try:
+        with open_source(input_file) as content:
+            outputs = explode_source(content, input_file.name, str(input_file))
+    except SyntaxError as e:
+        logger.error(f"Syntax error in {input_file}: {e}")
+        return
+    except Exception as e:
+        logger.error(f"Error reading {input_file}: {e}")
+        return
 
-    # Write the modified file
-    output_file = output_base / relative_path
-    output_file.write_text(ast.unparse(modified_tree), encoding="utf-8")
-    logger.info(f"Modified main file: {output_file}")
-    logger.debug(f"Extracted {len(definitions)} definitions from {input_file}")
+    write_outputs(output_dir, outputs)
+    record("file_finished", "Modified main file: {path}", path=output_base / relative_path)
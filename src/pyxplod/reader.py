@@ -0,0 +1,74 @@
+# this_file: src/pyxplod/reader.py
+"""Bulk, encoding-aware reading of source files.
+
+Sources are read as raw bytes and handed to `ast.parse` unchanged, so the
+parser honours PEP 263 encoding cookies (e.g. `# -*- coding: latin-1 -*-`)
+and no decoded copy of the text is kept alongside the bytes. Large files are
+memory-mapped instead of read into a buffer, and small files are read ahead in
+batches on a background thread while earlier files are being exploded. Modules
+without definitions are copied as their raw bytes, without a decode and
+re-encode.
+"""
+
+import mmap
+import os
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+# Files at least this large are memory-mapped rather than read
+MMAP_THRESHOLD = 1 << 20
+READ_BATCH_SIZE = 64
+
+
+@contextmanager
+def open_source(path: Path) -> Iterator[bytes | mmap.mmap]:
+    """Provide the raw content of a source file, memory-mapped when it is large.
+
+    A memory map is only valid inside the with block; see detach().
+    """
+    with path.open("rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield file.read()
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def detach(content: str | bytes) -> str | bytes:
+    """Return content as a str or bytes object that outlives any memory map it came from."""
+    # bytes() returns exact bytes objects as they are, without a copy
+    return content if isinstance(content, str) else bytes(content)
+
+
+def read_batch(files: list[Path]) -> list[tuple[Path, bytes | None]]:
+    """Read the small files of a batch; large or unreadable files get None."""
+    batch: list[tuple[Path, bytes | None]] = []
+    for file in files:
+        try:
+            data = file.read_bytes() if file.stat().st_size < MMAP_THRESHOLD else None
+        except OSError:
+            # Left to the consumer, which reports the error when it opens the file itself
+            data = None
+        batch.append((file, data))
+    return batch
+
+
+def prefetch_sources(files: list[Path], batch_size: int = READ_BATCH_SIZE) -> Iterator[tuple[Path, bytes | None]]:
+    """Yield files in order with their content, reading the next batch while one is consumed.
+
+    Large files are yielded with None, for the consumer to open with open_source().
+    At most two batches are held in memory.
+    """
+    batches = [files[start : start + batch_size] for start in range(0, len(files), batch_size)]
+    if not batches:
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(read_batch, batches[0])
+        for next_batch in [*batches[1:], None]:
+            batch = pending.result()
+            if next_batch is not None:
+                pending = executor.submit(read_batch, next_batch)
+            yield from batch
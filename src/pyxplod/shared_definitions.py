@@ -0,0 +1,123 @@
+# this_file: src/pyxplod/shared_definitions.py
+"""Content-addressed deduplication of identical extracted definitions.
+
+Copy-pasted helpers produce byte-identical extracted files in many packages.
+An extracted file holds its definition together with its filtered imports and
+needed module variables, so identical files behave identically wherever they
+live. After a run, the extracted files referenced by each exploded module are
+hashed, and every definition found at two or more sites below the same package
+root is moved once into `_shared_definitions/<name>_<hash>.py` there. The
+exploded modules are rewritten to import it from that location (including lazy
+loader mappings) and the copies are removed.
+
+Files with relative imports (e.g. through `--shared_imports`) depend on their
+location and are never shared. Modules outside any package cannot use relative
+imports and are left alone.
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from pyxplod.events import record
+from pyxplod.naming import to_snake_case
+from pyxplod.verify import exploded_main_path
+
+SHARED_DEFINITIONS_PACKAGE = "_shared_definitions"
+# Relative imports of extracted definitions, as generated by ast.unparse
+RELATIVE_IMPORT_PATTERN = re.compile(r"^from \.(\w+) import (\w+)$", re.MULTILINE)
+LAZY_ENTRY_PATTERN = re.compile(r"'(\w+)': '\.(\w+)'")
+# A definition is shared once it is extracted identically at this many sites
+MIN_SHARED_SITES = 2
+
+
+def package_root(directory: Path, output_root: Path) -> Path | None:
+    """Return the topmost package containing directory, without leaving output_root."""
+    if not (directory / "__init__.py").exists():
+        return None
+    root = directory
+    while root != output_root and (root.parent / "__init__.py").exists():
+        root = root.parent
+    return root
+
+
+def extracted_sites(main_path: Path, prefix: str) -> dict[str, str]:
+    """Map definition names to the extracted module stems an exploded module imports them from.
+
+    Only stems following the extracted file naming ('<prefix><snake_name>' with an
+    optional '_<n>' suffix) count, so the module's own relative imports are left alone.
+    """
+    # Modules copied without definitions keep their original encoding, which may not be UTF-8
+    code = main_path.read_bytes().decode("utf-8", errors="replace")
+    sites = {name: stem for stem, name in RELATIVE_IMPORT_PATTERN.findall(code)}
+    sites.update(LAZY_ENTRY_PATTERN.findall(code))
+    return {
+        name: stem
+        for name, stem in sites.items()
+        if re.fullmatch(rf"{re.escape(prefix + to_snake_case(name))}(_\d+)?", stem)
+    }
+
+
+def rewrite_imports(code: str, targets: dict[str, str]) -> str:
+    """Point the imports and lazy loader entries of extracted stems in targets to their new modules."""
+    code = RELATIVE_IMPORT_PATTERN.sub(
+        lambda m: f"from {targets[m[1]]} import {m[2]}" if m[1] in targets else m[0], code
+    )
+    return LAZY_ENTRY_PATTERN.sub(lambda m: f"'{m[1]}': '{targets[m[2]]}'" if m[2] in targets else m[0], code)
+
+
+def share_definitions(output_root: Path, relative_paths: list[Path], method: str) -> int:
+    """Move definitions extracted identically at several sites into shared modules.
+
+    Args:
+        output_root: Root of the exploded tree
+        relative_paths: Paths of the original modules, relative to the input root
+        method: Explosion method the tree was produced with
+
+    Returns:
+        The number of duplicate extracted files removed.
+    """
+    # (package root, digest, name) -> [(main module, extracted file)]
+    groups: dict[tuple[Path, str, str], list[tuple[Path, Path]]] = defaultdict(list)
+    for relative_path in relative_paths:
+        main_path = exploded_main_path(output_root, relative_path, method)
+        root = package_root(main_path.parent, output_root)
+        if root is None or not main_path.exists():
+            continue
+        prefix = "" if main_path.parent != output_root / relative_path.parent else f"{relative_path.stem}_"
+        for name, stem in extracted_sites(main_path, prefix).items():
+            extracted = main_path.parent / f"{stem}.py"
+            try:
+                data = extracted.read_bytes()
+            except OSError:
+                continue
+            if b"from ." in data:
+                continue
+            groups[root, hashlib.sha256(data).hexdigest(), name].append((main_path, extracted))
+
+    # Rewrites per exploded module: extracted stem -> shared module path relative to the module
+    rewrites: dict[Path, dict[str, str]] = defaultdict(dict)
+    removed = 0
+    for (root, digest, name), sites in groups.items():
+        if len(sites) < MIN_SHARED_SITES:
+            continue
+        shared_dir = root / SHARED_DEFINITIONS_PACKAGE
+        shared_stem = f"{to_snake_case(name)}_{digest[:12]}"
+        shared_dir.mkdir(exist_ok=True)
+        (shared_dir / "__init__.py").touch()
+        sites[0][1].replace(shared_dir / f"{shared_stem}.py")
+        for _main_path, extracted in sites[1:]:
+            extracted.unlink()
+        for main_path, extracted in sites:
+            level = len(main_path.parent.relative_to(root).parts) + 1
+            rewrites[main_path][extracted.stem] = f"{'.' * level}{SHARED_DEFINITIONS_PACKAGE}.{shared_stem}"
+        removed += len(sites) - 1
+        record("definition_shared", "Shared {name} from {sites} sites", "DEBUG", name=name, sites=len(sites))
+
+    for main_path, targets in rewrites.items():
+        code = rewrite_imports(main_path.read_text(encoding="utf-8"), targets)
+        # Replace rather than rewrite in place, so hard-linked copies of the module keep their own imports
+        main_path.unlink()
+        main_path.write_text(code, encoding="utf-8")
+    return removed
@@ -0,0 +1,148 @@
+# this_file: src/pyxplod/stream.py
+"""Single-file and stdin/stdout explosion for editor and pipeline integration.
+
+A single module is exploded in memory, skipping discovery and progress reporting.
+When streaming, the generated files are written to stdout as a bundle: each file
+is introduced by a header line naming its relative path, followed by its code.
+"""
+
+import sys
+from collections.abc import Callable
+from functools import partial
+from importlib.util import decode_source
+from pathlib import Path
+from typing import TextIO
+
+from loguru import logger
+
+from pyxplod.file_utils import write_outputs
+from pyxplod.processors import explode_source, explode_source_chunks, explode_source_dirs
+
+# Path value meaning "read from stdin" or "write to stdout"
+STREAM_PATH = "-"
+BUNDLE_HEADER_PREFIX = "# ==> "
+BUNDLE_HEADER_SUFFIX = " <=="
+
+EXPLODERS = {
+    "files": explode_source,
+    "dirs": explode_source_dirs,
+    "chunks": explode_source_chunks,
+}
+# Options accepted by each explosion method, e.g. {"shared_imports": True} for 'dirs'
+EXPLODER_OPTIONS = {
+    "files": frozenset(),
+    "dirs": frozenset({"shared_imports", "lazy_init"}),
+    "chunks": frozenset({"chunk_budget", "chunk_unit"}),
+}
+
+
+def get_exploder(method: str, options: dict | None = None) -> Callable[..., dict[str, str | bytes]]:
+    """Return the explode function of a method with its options bound.
+
+    Options that do not apply to the method are ignored, so one set of CLI options
+    can be passed regardless of the method.
+    """
+    explode = EXPLODERS[method]
+    bound = {key: value for key, value in (options or {}).items() if key in EXPLODER_OPTIONS[method]}
+    return partial(explode, **bound) if bound else explode
+
+
+def format_bundle(outputs: dict[str, str | bytes]) -> str:
+    """Format generated files as a multi-file bundle.
+
+    Raw bytes of copied modules are decoded according to their encoding cookie.
+    """
+    parts = []
+    for relative_name, output in outputs.items():
+        code = output if isinstance(output, str) else decode_source(output)
+        parts.append(f"{BUNDLE_HEADER_PREFIX}{relative_name}{BUNDLE_HEADER_SUFFIX}\n")
+        parts.append(code if code.endswith("\n") else f"{code}\n")
+    return "".join(parts)
+
+
+def parse_bundle(text: str) -> dict[str, str]:
+    """Split a multi-file bundle back into a mapping of relative paths to code."""
+    outputs: dict[str, str] = {}
+    current: str | None = None
+    lines: list[str] = []
+    for line in text.splitlines(keepends=True):
+        stripped = line.rstrip("\n")
+        if stripped.startswith(BUNDLE_HEADER_PREFIX) and stripped.endswith(BUNDLE_HEADER_SUFFIX):
+            if current is not None:
+                outputs[current] = "".join(lines)
+            current = stripped[len(BUNDLE_HEADER_PREFIX) : -len(BUNDLE_HEADER_SUFFIX)]
+            lines = []
+        elif current is not None:
+            lines.append(line)
+    if current is not None:
+        outputs[current] = "".join(lines)
+    return outputs
+
+
+def explode_single(
+    input_str: str,
+    output: str,
+    method: str = "files",
+    stdin_name: str = "stdin.py",
+    *,
+    options: dict | None = None,
+    stdin: TextIO | None = None,
+    stdout: TextIO | None = None,
+) -> bool:
+    """Explode one module from a file or stdin, writing to a directory or stdout.
+
+    Args:
+        input_str: Path to a .py file, or '-' to read the source from stdin
+        output: Output directory, or '-' to write a bundle to stdout
+        method: Explosion method - 'files', 'dirs' or 'chunks'
+        stdin_name: Module filename assumed for source read from stdin
+        options: Method options, see get_exploder
+        stdin: Stream to read from instead of sys.stdin; its binary buffer is used when it has one,
+            so the source's encoding cookie is honoured
+        stdout: Stream to write to instead of sys.stdout
+
+    Returns:
+        True if the module was exploded, False on error.
+    """
+    content: str | bytes
+    if input_str == STREAM_PATH:
+        stream = stdin or sys.stdin
+        try:
+            # Raw bytes, like files, so that ast.parse decodes them according to PEP 263
+            content = stream.buffer.read() if hasattr(stream, "buffer") else stream.read()
+        except UnicodeDecodeError as e:
+            logger.error(f"Error decoding <stdin>: {e}")
+            return False
+        filename = stdin_name
+        source_name = "<stdin>"
+    else:
+        input_file = Path(input_str).resolve()
+        try:
+            content = input_file.read_bytes()
+        except Exception as e:
+            logger.error(f"Error reading {input_file}: {e}")
+            return False
+        filename = input_file.name
+        source_name = str(input_file)
+
+    try:
+        outputs = get_exploder(method, options)(content, filename, source_name)
+        bundle = format_bundle(outputs) if output == STREAM_PATH else None
+    except SyntaxError as e:
+        logger.error(f"Syntax error in {source_name}: {e}")
+        return False
+    except UnicodeDecodeError as e:
+        logger.error(f"Error decoding {source_name}: {e}")
+        return False
+
+    if bundle is not None:
+        (stdout or sys.stdout).write(bundle)
+        return True
+
+    output_path = Path(output).resolve()
+    if output_path.exists() and not output_path.is_dir():
+        logger.error(f"Output path exists but is not a directory: {output_path}")
+        return False
+    write_outputs(output_path, outputs)
+    logger.info(f"Exploded {source_name} into {len(outputs)} files in {output_path}")
+    return True
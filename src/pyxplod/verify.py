@@ -0,0 +1,269 @@
+# this_file: src/pyxplod/verify.py
+"""Fast equivalence check between an original tree and its exploded output.
+
+Instead of re-running a test suite, each original module is compared with its
+exploded counterpart statically:
+
+- every top-level class and function must be reachable from the exploded module,
+  through `from .x import Name` imports or a lazy `_LAZY_SUBMODULES` mapping, and
+  its normalized AST (without line numbers) must hash to the same value;
+- every module the extracted definitions are imported from must exist, as a
+  '.py' file or a package;
+- the exploded module must bind the same public names as the original.
+
+Both trees are then imported, each in fresh interpreter processes with its root
+on `sys.path`: an exploded module that fails to import while its original does
+not is a mismatch, as is one exposing different public names (`__all__`, or the
+public names of `dir()` without the module's own submodules) at runtime.
+
+Modules are checked in parallel when more than one job is requested.
+"""
+
+import ast
+import hashlib
+import json
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from pyxplod.ast_utils import find_definitions, public_names
+from pyxplod.file_utils import find_python_files
+from pyxplod.processors.process_dirs_method import SHARED_IMPORTS_MODULE, is_special_file
+
+DEFINITION_TYPES = (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+LAZY_MAPPING_NAME = "_LAZY_SUBMODULES"
+# Seconds a process importing a batch of modules may take
+IMPORT_TIMEOUT = 120
+
+# Run as `python -c IMPORT_CHECK_SCRIPT <sys.path entry> <result file> <module>...`; the
+# result goes to a file since imported modules may print to stdout
+IMPORT_CHECK_SCRIPT = """
+import importlib, json, sys, types
+sys.path.insert(0, sys.argv[1])
+results = {}
+for name in sys.argv[3:]:
+    try:
+        module = importlib.import_module(name)
+    except BaseException as e:
+        results[name] = {'error': f'{type(e).__name__}: {e}'}
+        continue
+    exported = getattr(module, '__all__', None)
+    if exported is None:
+        exported = [
+            attribute for attribute in dir(module)
+            if not attribute.startswith('_')
+            and not (
+                isinstance(value := getattr(module, attribute, None), types.ModuleType)
+                and value.__name__.startswith(name + '.')
+            )
+        ]
+    results[name] = {'names': sorted(map(str, exported))}
+with open(sys.argv[2], 'w', encoding='utf-8') as result_file:
+    json.dump(results, result_file)
+"""
+
+
+def definition_hash(node: ast.AST) -> str:
+    """Hash a definition by its AST structure, ignoring positions and formatting."""
+    return hashlib.sha256(ast.dump(node).encode("utf-8")).hexdigest()
+
+
+def relative_submodules(tree: ast.Module) -> dict[str, str]:
+    """Map names to the relative submodules they are imported from in an exploded module.
+
+    Handles both eager `from .x import Name` imports and the lazy loader mapping.
+    Names bound by `from . import x` map to the module path '.x' itself.
+    """
+    submodules: dict[str, str] = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and (node.level > 0 or (node.module or "").startswith(".")):
+            module = "." * node.level + (node.module or "")
+            for alias in node.names:
+                bound = alias.asname or alias.name
+                submodules[bound] = f"{module}{alias.name}" if module.strip(".") == "" else module
+        elif (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id == LAZY_MAPPING_NAME
+        ):
+            submodules.update(ast.literal_eval(node.value))
+    return submodules
+
+
+def resolve_module(main_path: Path, module_path: str) -> Path | None:
+    """Return the file a relative module path refers to from an exploded module, if it exists.
+
+    Both plain modules ('x.py') and packages ('x/__init__.py') are accepted.
+    """
+    relative_module = module_path.lstrip(".")
+    level = len(module_path) - len(relative_module)
+    if level > len(main_path.parents):
+        return None
+    base = main_path.parents[level - 1] / relative_module.replace(".", "/")
+    for candidate in (base.with_name(f"{base.name}.py"), base / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def exploded_main_path(output_root: Path, relative_path: Path, method: str) -> Path:
+    """Return the exploded counterpart of an original module."""
+    if method in ("dirs", "chunks") and not is_special_file(relative_path.name):
+        return output_root / relative_path.parent / relative_path.stem / "__init__.py"
+    return output_root / relative_path
+
+
+def verify_module(input_root: Path, output_root: Path, relative_path: Path, method: str) -> list[str]:
+    """Compare one original module with its exploded counterpart and return the problems found."""
+    try:
+        original = ast.parse((input_root / relative_path).read_bytes(), filename=str(relative_path))
+    except SyntaxError as e:
+        return [f"{relative_path}: original module does not parse: {e}"]
+    main_path = exploded_main_path(output_root, relative_path, method)
+    if not main_path.exists():
+        return [f"{relative_path}: exploded module {main_path} is missing"]
+    try:
+        exploded = ast.parse(main_path.read_bytes(), filename=str(main_path))
+    except SyntaxError as e:
+        return [f"{relative_path}: exploded module does not parse: {e}"]
+
+    problems: list[str] = []
+    # Later definitions of the same name shadow earlier ones, in the original and exploded alike
+    original_definitions = {name: node for node, _def_type, name in find_definitions(original)}
+    submodules = relative_submodules(exploded)
+    # Only the modules pyxplod generated are checked; the original's own relative imports are the user's
+    generated_modules = {
+        module_path
+        for name, module_path in submodules.items()
+        if name in original_definitions or module_path == f".{SHARED_IMPORTS_MODULE}"
+    }
+    parsed_submodules: dict[str, ast.Module | None] = {}
+    for module_path in generated_modules:
+        submodule_file = resolve_module(main_path, module_path)
+        parsed_submodules[module_path] = None
+        if submodule_file is None:
+            problems.append(f"{relative_path}: imported module {module_path} is missing")
+            continue
+        try:
+            parsed_submodules[module_path] = ast.parse(submodule_file.read_bytes(), filename=str(submodule_file))
+        except SyntaxError as e:
+            problems.append(f"{relative_path}: module {submodule_file} does not parse: {e}")
+
+    exploded_definitions = {node.name: node for node in exploded.body if isinstance(node, DEFINITION_TYPES)}
+    for name, node in original_definitions.items():
+        found = exploded_definitions.get(name)
+        if found is None and name in submodules:
+            submodule = parsed_submodules.get(submodules[name])
+            if submodule is None:
+                continue  # Already reported as missing or broken
+            candidates = [n for n in submodule.body if isinstance(n, DEFINITION_TYPES) and n.name == name]
+            found = candidates[-1] if candidates else None
+        if found is None:
+            problems.append(f"{relative_path}: definition '{name}' not found in exploded output")
+        elif definition_hash(found) != definition_hash(node):
+            problems.append(f"{relative_path}: definition '{name}' differs from the original")
+
+    expected = public_names(original)
+    actual = public_names(exploded) | {name for name in submodules if not name.startswith("_")}
+    if missing := sorted(expected - actual):
+        problems.append(f"{relative_path}: public names missing from exploded module: {', '.join(missing)}")
+    if unexpected := sorted(actual - expected):
+        problems.append(f"{relative_path}: unexpected public names in exploded module: {', '.join(unexpected)}")
+    return problems
+
+
+def module_name(root: Path, relative_path: Path) -> tuple[Path, str | None]:
+    """Return the sys.path entry and dotted name to import a module of a tree by.
+
+    A root that is itself a package is imported from its parent, so that relative
+    imports work. __main__ modules and a top-level __init__.py get no name.
+    """
+    parts = list(relative_path.with_suffix("").parts)
+    while (root / "__init__.py").exists():
+        parts.insert(0, root.name)
+        root = root.parent
+    if parts and parts[-1] == "__init__":
+        parts.pop()
+    if not parts or parts[-1] == "__main__":
+        return root, None
+    return root, ".".join(parts)
+
+
+def import_public_names(path_entry: Path, names: list[str]) -> dict[str, dict]:
+    """Import modules in a fresh interpreter and return their public names or import errors."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        result_file = Path(temp_dir) / "imports.json"
+        command = [sys.executable, "-c", IMPORT_CHECK_SCRIPT, str(path_entry), str(result_file), *names]
+        try:
+            subprocess.run(  # noqa: S603
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=IMPORT_TIMEOUT,
+                check=False,
+            )
+            return json.loads(result_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+            return {name: {"error": f"import check did not complete: {e}"} for name in names}
+
+
+def import_tree(root: Path, relative_paths: list[Path], jobs: int) -> dict[str, dict]:
+    """Import the modules of a tree in up to jobs processes, keyed by dotted name."""
+    path_entry, names = root, []
+    for relative_path in relative_paths:
+        path_entry, name = module_name(root, relative_path)
+        if name is not None:
+            names.append(name)
+    if not names:
+        return {}
+    batches = [names[start::jobs] for start in range(min(jobs, len(names)))]
+    with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+        results: dict[str, dict] = {}
+        for batch in executor.map(import_public_names, [path_entry] * len(batches), batches):
+            results.update(batch)
+    return results
+
+
+def compare_imports(input_root: Path, output_root: Path, relative_paths: list[Path], jobs: int) -> list[str]:
+    """Import both trees and compare each module's import outcome and runtime public names."""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        original_future = executor.submit(import_tree, input_root, relative_paths, jobs)
+        exploded = import_tree(output_root, relative_paths, jobs)
+        original = original_future.result()
+
+    problems: list[str] = []
+    for relative_path in relative_paths:
+        _path_entry, name = module_name(input_root, relative_path)
+        before, after = original.get(name), exploded.get(name)
+        # Modules that cannot be imported in the original tree cannot be compared
+        if before is None or after is None or "error" in before:
+            continue
+        if "error" in after:
+            problems.append(f"{relative_path}: exploded module fails to import: {after['error']}")
+            continue
+        if missing := sorted(set(before["names"]) - set(after["names"])):
+            problems.append(f"{relative_path}: public names missing after import: {', '.join(missing)}")
+        if unexpected := sorted(set(after["names"]) - set(before["names"])):
+            problems.append(f"{relative_path}: unexpected public names after import: {', '.join(unexpected)}")
+    return problems
+
+
+def verify_tree(input_root: Path, output_root: Path, method: str = "files", jobs: int = 1) -> list[str]:
+    """Verify every module of an original tree against its exploded output.
+
+    Returns the problems found, empty when the trees are equivalent.
+    """
+    relative_paths = [file.relative_to(input_root) for file in find_python_files(input_root)]
+    arguments = ([input_root] * len(relative_paths), [output_root] * len(relative_paths), relative_paths)
+    methods = [method] * len(relative_paths)
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(verify_module, *arguments, methods, chunksize=16))
+    else:
+        results = list(map(verify_module, *arguments, methods))
+    problems = [problem for problems in results for problem in problems]
+    return problems + compare_imports(input_root, output_root, relative_paths, max(jobs, 1))
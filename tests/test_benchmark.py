@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# this_file: tests/test_benchmark.py
+
+"""Benchmarks for pyxplod performance-sensitive paths.
+
+Run with `hatch run test:bench`; requires pytest-benchmark.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from pyxplod.cli import main
+from pyxplod.file_utils import generate_filename
+from pyxplod.naming import NameAllocator
+from pyxplod.processors import explode_source, explode_source_chunks
+from pyxplod.reader import prefetch_sources
+
+BENCH_ROUNDS = 5
+TREE_FILES = 100
+DEFINITIONS_PER_FILE = 10
+
+
+def make_tree(root, files=TREE_FILES, definitions=DEFINITIONS_PER_FILE):
+    """Create a synthetic project with many small modules."""
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(files):
+        body = ["import os", "LIMIT = 10"]
+        for j in range(definitions):
+            body.append(f"def func_{j}(x):\n    return os.path.join(str(x), str(LIMIT))")
+        body.append(f"class Model{i}:\n    pass")
+        (root / f"module_{i}.py").write_text("\n\n".join(body) + "\n")
+    return root
+
+
+@pytest.mark.benchmark(group="logging")
+@pytest.mark.parametrize("log_mode", ["lines", "summary"])
+def test_logging_overhead(benchmark, tmp_path, log_mode):
+    """Compare per-file log lines against aggregated summary logging."""
+    input_dir = make_tree(tmp_path / "input")
+    output_dir = tmp_path / "output"
+
+    benchmark.pedantic(main, args=(str(input_dir), str(output_dir)), kwargs={"log_mode": log_mode}, rounds=BENCH_ROUNDS)
+
+
+HEAVY_IMPORTS = """import decimal
+import fractions
+import statistics
+from email.mime.text import MIMEText
+from xml.dom import minidom
+"""
+
+
+def make_heavy_module(root, definitions=200):
+    """Create a package whose main module has heavy imports used across many definitions."""
+    package = root / "heavy_pkg"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    body = [HEAVY_IMPORTS]
+    for i in range(definitions):
+        uses = ["decimal.Decimal(x)", "fractions.Fraction(1)", "statistics.mean([1])", "MIMEText('a')", "minidom"]
+        body.append(f"def func_{i}(x):\n    return {uses[i % len(uses)]}")
+    (package / "api.py").write_text("\n\n".join(body) + "\n")
+    return root
+
+
+@pytest.mark.benchmark(group="import")
+@pytest.mark.parametrize("variant", ["original", "dirs", "dirs-shared-imports", "dirs-lazy-init"])
+def test_import_latency(benchmark, tmp_path, variant):
+    """Compare cold import time of the original and exploded packages."""
+    source_root = make_heavy_module(tmp_path / "input")
+    if variant == "original":
+        root = source_root
+    else:
+        root = tmp_path / "output"
+        main(
+            str(source_root),
+            str(root),
+            "dirs",
+            shared_imports=variant == "dirs-shared-imports",
+            lazy_init=variant == "dirs-lazy-init",
+        )
+
+    command = [sys.executable, "-c", "import heavy_pkg.api"]
+    benchmark.pedantic(subprocess.run, args=(command,), kwargs={"cwd": root, "check": True}, rounds=BENCH_ROUNDS)
+
+
+@pytest.mark.benchmark(group="chunks")
+@pytest.mark.parametrize("definitions", [1000, 5000])
+def test_chunk_packing(benchmark, definitions):
+    """Measure the 'chunks' method on modules with thousands of definitions."""
+    body = ["import os", "from json import dumps", "LIMIT = 10"]
+    for i in range(definitions):
+        uses = ["os.sep", "dumps(x)", "LIMIT"][i % 3]
+        body.append(f"def func_{i}(x):\n    return ({uses}, func_{max(i - 1, 0)})")
+    source = "\n\n".join(body) + "\n"
+
+    benchmark.pedantic(
+        explode_source_chunks, args=(source, "big.py"), kwargs={"chunk_budget": 4000}, rounds=BENCH_ROUNDS
+    )
+
+
+NAMING_DEFINITIONS = 100_000
+
+
+@pytest.mark.benchmark(group="naming")
+@pytest.mark.parametrize("dedup", ["probing", "allocator"])
+def test_naming(benchmark, dedup):
+    """Name 100k definitions with many repeated names, as in large generated modules."""
+    names = [f"Handler{i % 500}" if i % 2 else f"getHTTPValue{i}" for i in range(NAMING_DEFINITIONS)]
+
+    def allocate_all():
+        existing = set() if dedup == "probing" else NameAllocator()
+        return [generate_filename("module", name, existing) for name in names]
+
+    benchmark.pedantic(allocate_all, rounds=BENCH_ROUNDS)
+
+
+@pytest.mark.benchmark(group="reader")
+@pytest.mark.parametrize("reader", ["read_text", "prefetch"])
+def test_read_tree(benchmark, tmp_path, reader):
+    """Compare reading each file before exploding it against prefetching reads during explosion.
+
+    Prefetching only overlaps reads with parsing, so it can only help when reads are slow
+    (cold cache, network filesystems); with a warm page cache both are expected to be even.
+    """
+    files = sorted(make_tree(tmp_path / "input", files=TREE_FILES * 5).glob("*.py"))
+
+    def explode_all():
+        if reader == "read_text":
+            sources = ((file, file.read_text(encoding="utf-8")) for file in files)
+        else:
+            sources = prefetch_sources(files)
+        for file, content in sources:
+            explode_source(content, file.name, str(file))
+
+    benchmark.pedantic(explode_all, rounds=BENCH_ROUNDS)
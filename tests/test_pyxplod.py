@@ -4,19 +4,48 @@
 """Test suite for pyxplod functionality."""
 
 import ast
+import importlib
+import io
+import json
+import mmap
+import os
+import sys
+import threading
+from collections import Counter
+
+import pytest
 
+from pyxplod import checkpoint as checkpoint_module
+from pyxplod import events, reader
 from pyxplod.ast_utils import (
     create_import_statement,
     extract_imports,
     find_definitions,
 )
+from pyxplod.checkpoint import CHECKPOINT_FILENAME, Checkpoint, file_stamp
+from pyxplod.cli import main
+from pyxplod.client import default_socket_path, send_request
+from pyxplod.daemon import DaemonServer, ExplodeCache, serve, socket_in_use
+from pyxplod.dedup import SourceDeduplicator
 from pyxplod.file_utils import (
     find_python_files,
     generate_filename,
     validate_paths,
+    write_outputs,
 )
-from pyxplod.processors import process_python_file, process_python_file_dirs
-from pyxplod.utils import to_snake_case
+from pyxplod.naming import NameAllocator, to_snake_case
+from pyxplod.processors import (
+    explode_source,
+    explode_source_chunks,
+    explode_source_dirs,
+    process_python_file,
+    process_python_file_dirs,
+)
+from pyxplod.processors.process_chunks_method import DEFAULT_CHUNK_BUDGET, pack_chunks
+from pyxplod.reader import open_source, prefetch_sources
+from pyxplod.scheduler import TIMINGS_FILENAME, load_timings, plan_tasks
+from pyxplod.stream import explode_single, format_bundle, parse_bundle
+from pyxplod.verify import resolve_module, verify_tree
 
 
 class TestUtilityFunctions:
@@ -103,6 +132,21 @@ x = 10  # Not a definition
         name4 = generate_filename("module", "OtherClass", existing)  # "class" argument removed
         assert name4 == "module_other_class.py"
 
+    def test_name_allocator(self):
+        """Test that the allocator matches set-based naming, including taken suffixes."""
+        allocator = NameAllocator()
+        names = ["MyClass", "my_class_2", "MyClass", "MyClass", "myClass"]
+        legacy: set[str] = set()
+
+        allocated = [allocator.for_definition(name) for name in names]
+
+        assert allocated == ["my_class.py", "my_class_2.py", "my_class_3.py", "my_class_4.py", "my_class_5.py"]
+        assert allocated == [generate_filename("m", name, legacy)[2:] for name in names]
+        assert to_snake_case.cache_info().hits > 0
+
+        allocator.reserve("_imports.py")
+        assert allocator.for_definition("_imports") == "_imports_2.py"
+
     def test_create_import_statement(self):
         """Test creation of import statements."""
         import_stmt = create_import_statement(".module_my_class", "MyClass")
@@ -345,6 +389,96 @@ print("Module loaded")
         assert "def test_function():" in func_content
         assert "return 42" in func_content
 
+    def test_shared_imports_dirs(self):
+        """Test that shared imports are emitted once and re-imported by name."""
+        source = """
+from __future__ import annotations
+import os.path
+from json import dumps as to_json
+
+def join(a):
+    return os.path.join(a, "x")
+
+def dump(x):
+    return to_json(x)
+"""
+        outputs = explode_source_dirs(source, "mod.py", shared_imports=True)
+
+        shared = outputs["mod/_imports.py"]
+        assert "import os.path" in shared
+        assert "from json import dumps as to_json" in shared
+        assert "__future__" not in shared
+        assert outputs["mod/join.py"].startswith("from ._imports import os\n")
+        assert outputs["mod/dump.py"].startswith("from ._imports import to_json\n")
+        init_lines = outputs["mod/__init__.py"].splitlines()
+        assert init_lines[:2] == ["from __future__ import annotations", "from ._imports import os, to_json"]
+
+    def test_lazy_init_dirs(self, tmp_path, monkeypatch):
+        """Test that a lazy __init__.py imports extracted submodules on first access."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "lazy_mod.py").write_text(
+            """
+class Worker:
+    pass
+
+class Helper:
+    pass
+
+def build():
+    return 42
+
+DEFAULT = build()
+"""
+        )
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "dirs", lazy_init=True)
+        monkeypatch.syspath_prepend(str(output_dir))
+
+        module = importlib.import_module("lazy_mod")
+        try:
+            # build() runs at import time, so it and nothing else is loaded eagerly
+            assert "lazy_mod.build" in sys.modules
+            assert "lazy_mod.worker" not in sys.modules
+            assert "Worker" in dir(module)
+            assert module.Worker.__name__ == "Worker"
+            assert "lazy_mod.worker" in sys.modules
+            assert module.DEFAULT == 42
+            assert module.Helper.__name__ == "Helper"
+            with pytest.raises(AttributeError):
+                _ = module.Missing
+            # Star imports go through the generated __all__
+            (output_dir / "lazy_mod_star.py").write_text("from lazy_mod import *\n")
+            star = vars(importlib.import_module("lazy_mod_star"))
+            assert {"Worker", "Helper", "build", "DEFAULT"} <= star.keys()
+            assert "_LAZY_SUBMODULES" not in star
+        finally:
+            for name in [name for name in sys.modules if name.startswith("lazy_mod")]:
+                del sys.modules[name]
+
+    def test_lazy_init_keeps_module_getattr(self, tmp_path, monkeypatch):
+        """Test that a module with its own __getattr__ keeps an eager __init__.py that still serves it."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "dyn.py").write_text(
+            "def current():\n    return 2\n\n"
+            "def __getattr__(name):\n"
+            "    if name == 'legacy':\n"
+            "        return 2\n"
+            "    raise AttributeError(name)\n"
+        )
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "dirs", lazy_init=True)
+        monkeypatch.syspath_prepend(str(output_dir))
+
+        assert "_LAZY_SUBMODULES" not in (output_dir / "dyn" / "__init__.py").read_text()
+        try:
+            module = importlib.import_module("dyn")
+            assert module.legacy == 2
+        finally:
+            for name in [name for name in sys.modules if name.startswith("dyn")]:
+                del sys.modules[name]
+
     def test_process_file_no_definitions_dirs(self, tmp_path):
         """Test processing a file with no definitions using dirs method."""
         input_dir = tmp_path / "input"
@@ -368,3 +502,710 @@ DEBUG = True
         assert (output_dir / "constants").is_dir()
         assert (output_dir / "constants" / "__init__.py").exists()
         assert (output_dir / "constants" / "__init__.py").read_text() == test_file.read_text()
+
+
+class TestStreaming:
+    """Test single-file and stdin/stdout explosion."""
+
+    SOURCE = """
+import os
+
+class TestClass:
+    pass
+
+def test_function():
+    return os.getcwd()
+"""
+
+    def test_bundle_round_trip(self):
+        """Test that a bundle can be split back into its files."""
+        outputs = {"a.py": "x = 1", "pkg/__init__.py": "from .a import x\n"}
+        parsed = parse_bundle(format_bundle(outputs))
+        assert parsed == {"a.py": "x = 1\n", "pkg/__init__.py": "from .a import x\n"}
+
+    def test_stdin_to_stdout(self):
+        """Test exploding source from stdin into a bundle on stdout."""
+        stdout = io.StringIO()
+        assert explode_single("-", "-", "files", "mod.py", stdin=io.StringIO(self.SOURCE), stdout=stdout)
+
+        files = parse_bundle(stdout.getvalue())
+        assert list(files) == ["mod_test_class.py", "mod_test_function.py", "mod.py"]
+        assert "import os" in files["mod_test_function.py"]
+        assert "from .mod_test_class import TestClass" in files["mod.py"]
+
+    def test_stdin_bytes_honour_encoding_cookie(self):
+        """Test that stdin is read as bytes, so a PEP 263 cookie decides the encoding."""
+        source = "# -*- coding: latin-1 -*-\ndef greet():\n    return 'café'\n"
+        stdin = io.TextIOWrapper(io.BytesIO(source.encode("latin-1")), encoding="utf-8")
+        stdout = io.StringIO()
+
+        assert explode_single("-", "-", "files", "mod.py", stdin=stdin, stdout=stdout)
+        assert "'café'" in parse_bundle(stdout.getvalue())["mod_greet.py"]
+
+        undecodable = io.TextIOWrapper(io.BytesIO(b"x = '\xff'\n"), encoding="utf-8")
+        assert not explode_single("-", "-", stdin=undecodable, stdout=io.StringIO())
+
+    def test_single_file_dirs_to_directory(self, tmp_path):
+        """Test exploding a single file into an output directory."""
+        test_file = tmp_path / "mod.py"
+        test_file.write_text(self.SOURCE)
+        output_dir = tmp_path / "out"
+
+        assert explode_single(str(test_file), str(output_dir), "dirs")
+        assert (output_dir / "mod" / "__init__.py").exists()
+        assert (output_dir / "mod" / "test_class.py").exists()
+        assert (output_dir / "mod" / "test_function.py").exists()
+
+    def test_syntax_error(self):
+        """Test that broken source produces no bundle."""
+        stdout = io.StringIO()
+        assert not explode_single("-", "-", stdin=io.StringIO("def broken(:\n"), stdout=stdout)
+        assert stdout.getvalue() == ""
+
+    def test_cli_exit_status_on_error(self, tmp_path):
+        """Test that the CLI exits with status 1 when a single module cannot be exploded."""
+        broken = tmp_path / "broken.py"
+        broken.write_text("def broken(:\n")
+
+        with pytest.raises(SystemExit) as exc_info:
+            main(str(broken), str(tmp_path / "out"))
+        assert exc_info.value.code == 1
+
+
+class TestDaemon:
+    """Test the warm-cache daemon and its client."""
+
+    def test_cache_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = ExplodeCache(max_entries=2)
+        cache.put(("a", "files"), "A")
+        cache.put(("b", "files"), "B")
+        cache.get(("a", "files"))
+        cache.put(("c", "files"), "C")
+
+        assert cache.get(("a", "files")) == "A"
+        assert cache.get(("b", "files")) is None
+        assert len(cache) == 2
+
+    def test_repeat_explosion_uses_cache(self, tmp_path):
+        """Test that a second request for an unchanged tree is served from cache."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "mod.py").write_text("def f():\n    return 1\n")
+        (input_dir / "other.py").write_text("class C:\n    pass\n")
+        output_dir = tmp_path / "output"
+        socket_path = tmp_path / "d.sock"
+
+        server = DaemonServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            request = {"input": str(input_dir), "output": str(output_dir), "method": "files"}
+            first = send_request(request, socket_path)
+            assert first["ok"]
+            assert first["exploded"] == 2
+            assert (output_dir / "mod_f.py").exists()
+
+            (input_dir / "mod.py").write_text("def f():\n    return 2\n")
+            (output_dir / "other_c.py").unlink()
+            second = send_request(request, socket_path)
+            assert second["cached"] == 1
+            assert second["exploded"] == 1
+            assert "return 2" in (output_dir / "mod_f.py").read_text()
+            assert (output_dir / "other_c.py").exists()
+
+            assert send_request({"command": "stats"}, socket_path)["entries"] == 2
+            assert not send_request({"input": str(input_dir), "output": str(output_dir), "method": "x"}, socket_path)[
+                "ok"
+            ]
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestDeduplication:
+    """Test content-hash deduplication of identical source files."""
+
+    def test_serve_refuses_socket_in_use(self, tmp_path):
+        """Test that a second daemon does not take over the socket of a running one, but replaces a stale one."""
+        socket_path = tmp_path / "d.sock"
+        server = DaemonServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(SystemExit):
+                serve(str(socket_path))
+            assert send_request({"command": "stats"}, socket_path)["entries"] == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+        # The socket file is left behind without a listener, as after a crash
+        assert socket_path.exists()
+        assert not socket_in_use(socket_path)
+
+    def test_default_socket_is_per_user(self, monkeypatch, tmp_path):
+        """Test that the default socket lives in the user's runtime directory when there is one."""
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        assert default_socket_path() == tmp_path / "pyxplod.sock"
+        monkeypatch.delenv("XDG_RUNTIME_DIR")
+        assert str(os.getuid()) in default_socket_path().name
+
+    def _make_tree(self, root):
+        for name in ("a", "b", "c"):
+            (root / name).mkdir(parents=True)
+            (root / name / "models.py").write_text("class Model:\n    pass\n")
+        (root / "c" / "models.py").write_text("class Other:\n    pass\n")
+
+    def test_identical_sources_exploded_once(self, tmp_path):
+        """Test that identical files reuse outputs and distinct ones do not."""
+        input_dir = tmp_path / "input"
+        self._make_tree(input_dir)
+        output_dir = tmp_path / "output"
+        files = find_python_files(input_dir)
+
+        deduplicator = SourceDeduplicator(files, "files")
+        for file in files:
+            deduplicator.process(file, output_dir, input_dir)
+
+        assert deduplicator.reused == 1
+        assert (output_dir / "b" / "models_model.py").read_text() == (output_dir / "a" / "models_model.py").read_text()
+        assert (output_dir / "c" / "models_other.py").exists()
+        assert not deduplicator._memo
+
+    def test_hardlink_outputs(self, tmp_path):
+        """Test that identical outputs are hard-linked when requested."""
+        input_dir = tmp_path / "input"
+        self._make_tree(input_dir)
+        output_dir = tmp_path / "output"
+
+        main(str(input_dir), str(output_dir), "dirs", hardlink=True)
+
+        first = output_dir / "a" / "models" / "model.py"
+        second = output_dir / "b" / "models" / "model.py"
+        assert first.stat().st_ino == second.stat().st_ino
+        assert (output_dir / "c" / "models" / "other.py").stat().st_nlink == 1
+
+    @pytest.mark.parametrize("hardlink", [False, True])
+    def test_rerun_over_hardlinked_outputs(self, tmp_path, hardlink):
+        """Test that a rerun replaces hard-linked outputs instead of writing through the links."""
+        input_dir = tmp_path / "input"
+        self._make_tree(input_dir)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "files", hardlink=True)
+
+        (input_dir / "a" / "models.py").write_text("class Model:\n    value = 1\n")
+        main(str(input_dir), str(output_dir), "files", hardlink=hardlink)
+
+        assert "value = 1" in (output_dir / "a" / "models_model.py").read_text()
+        assert "value = 1" not in (output_dir / "b" / "models_model.py").read_text()
+
+
+class TestEvents:
+    """Test aggregated event logging."""
+
+    def test_record_counts_and_logs_events(self, tmp_path):
+        """Test that events are counted and written to the JSON-lines log."""
+        log_file = tmp_path / "events.jsonl"
+        events.start(events.EventCounter(event_log=log_file, interval=0))
+        events.record("file_started", "Processing: {path}", path=tmp_path / "a.py")
+        events.record("file_started", "Processing: {path}", path=tmp_path / "b.py")
+        events.record("file_written", "Created file: {path}", "DEBUG", path=tmp_path / "c.py")
+        counter = events.stop()
+
+        assert counter.counts == {"file_started": 2, "file_written": 1}
+        assert counter.summary() == "file_started=2, file_written=1"
+        lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [line["event"] for line in lines] == ["file_started", "file_started", "file_written"]
+        assert lines[0]["path"] == str(tmp_path / "a.py")
+
+    def test_summary_mode_end_to_end(self, tmp_path):
+        """Test that summary mode still explodes files and logs every event to file."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "mod.py").write_text("def f():\n    pass\n\ndef g():\n    pass\n")
+        output_dir = tmp_path / "output"
+        log_file = tmp_path / "events.jsonl"
+
+        main(str(input_dir), str(output_dir), log_mode="summary", event_log=str(log_file))
+
+        assert (output_dir / "mod_f.py").exists()
+        names = [json.loads(line)["event"] for line in log_file.read_text().splitlines()]
+        assert names.count("file_written") == 3
+        assert "file_started" in names
+
+    def test_processors_report_through_events(self, tmp_path):
+        """Test that per-file processor messages are counted instead of bypassing the counter."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "mod.py").write_text("LIMIT = 1\n\ndef f():\n    return LIMIT\n")
+        events.start(events.EventCounter(aggregate=True, interval=0))
+        process_python_file(input_dir / "mod.py", tmp_path / "files", input_dir)
+        process_python_file_dirs(input_dir / "mod.py", tmp_path / "dirs", input_dir)
+        counter = events.stop()
+
+        assert counter.counts["file_finished"] == 2
+        assert counter.counts["variable_included"] == 2
+
+
+class TestCheckpoint:
+    """Test crash-recovery checkpoints."""
+
+    def test_journal_round_trip(self, tmp_path):
+        """Test that completed files survive in the journal and changed files are redone."""
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        output_dir = tmp_path / "output"
+        output_dir.mkdir()
+
+        checkpoint = Checkpoint(output_dir, tmp_path, "files")
+        checkpoint.mark_done("a.py", file_stamp(source))
+        checkpoint.close(success=False)
+        with (output_dir / CHECKPOINT_FILENAME).open("a") as journal:
+            journal.write('["torn", 1')
+
+        resumed = Checkpoint(output_dir, tmp_path, "files", resume=True)
+        assert resumed.is_done("a.py", file_stamp(source))
+        assert not resumed.is_done("torn", (1, 0))
+        resumed.close(success=True)
+        assert not (output_dir / CHECKPOINT_FILENAME).exists()
+
+        other_method = Checkpoint(output_dir, tmp_path, "dirs", resume=True)
+        assert not other_method.is_done("a.py", file_stamp(source))
+        other_method.close(success=True)
+
+    def test_outputs_are_synced_before_journal(self, tmp_path, monkeypatch):
+        """Test that journal lines are only written once the outputs they cover are synced."""
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        output_dir = tmp_path / "output"
+        output_dir.mkdir()
+        output_file = output_dir / "a.py"
+        output_file.write_text("x = 1\n")
+        journal = output_dir / CHECKPOINT_FILENAME
+        synced = []
+        monkeypatch.setattr(checkpoint_module, "fsync_path", lambda path: synced.append((path, journal.read_text())))
+
+        checkpoint = Checkpoint(output_dir, tmp_path, "files")
+        checkpoint.mark_done("a.py", file_stamp(source), [output_file])
+        assert len(journal.read_text().splitlines()) == 1
+        checkpoint.close(success=False)
+
+        assert [path for path, _journal in synced] == [output_file, output_dir]
+        assert all(len(text.splitlines()) == 1 for _path, text in synced)
+        assert len(journal.read_text().splitlines()) == 2
+
+    def test_changed_options_start_from_scratch(self, tmp_path):
+        """Test that a journal written with other method options is not resumed."""
+        source = tmp_path / "a.py"
+        source.write_text("x = 1\n")
+        output_dir = tmp_path / "output"
+        output_dir.mkdir()
+
+        checkpoint = Checkpoint(output_dir, tmp_path, "dirs", options={"lazy_init": False})
+        checkpoint.mark_done("a.py", file_stamp(source))
+        checkpoint.close(success=False)
+
+        same = Checkpoint(output_dir, tmp_path, "dirs", resume=True, options={"lazy_init": False})
+        assert same.is_done("a.py", file_stamp(source))
+        same.close(success=False)
+        changed = Checkpoint(output_dir, tmp_path, "dirs", resume=True, options={"lazy_init": True})
+        assert not changed.is_done("a.py", file_stamp(source))
+        changed.close(success=True)
+
+    def test_resume_skips_completed_files(self, tmp_path):
+        """Test that --resume only processes files missing from the checkpoint."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "done.py").write_text("def done():\n    pass\n")
+        (input_dir / "todo.py").write_text("def todo():\n    pass\n")
+        output_dir = tmp_path / "output"
+        output_dir.mkdir()
+
+        # The options main() passes by default
+        options = {
+            "shared_imports": False,
+            "lazy_init": False,
+            "chunk_budget": DEFAULT_CHUNK_BUDGET,
+            "chunk_unit": "bytes",
+        }
+        checkpoint = Checkpoint(output_dir, input_dir.resolve(), "files", options=options)
+        checkpoint.mark_done("done.py", file_stamp(input_dir / "done.py"))
+        checkpoint.close(success=False)
+
+        main(str(input_dir), str(output_dir), resume=True)
+
+        assert (output_dir / "todo_todo.py").exists()
+        assert not (output_dir / "done_done.py").exists()
+        assert not (output_dir / CHECKPOINT_FILENAME).exists()
+
+
+class TestScheduler:
+    """Test cost-aware scheduling and splitting of giant modules."""
+
+    def test_plan_tasks_splits_and_orders_by_cost(self, tmp_path):
+        """Test that the dominant file is split and the biggest tasks come first."""
+        huge, small, tiny = tmp_path / "huge.py", tmp_path / "small.py", tmp_path / "tiny.py"
+        tasks = plan_tasks({small: 2.0, huge: 10.0, tiny: 1.0}, jobs=4)
+
+        # A fourth part would add more repeated parsing than it saves
+        assert tasks[:3] == [(huge, part, 3) for part in range(3)]
+        assert tasks[3:] == [(small, 0, 1), (tiny, 0, 1)]
+
+    def test_plan_tasks_charges_overhead_per_part(self, tmp_path):
+        """Test that files are split less when other work already fills the workers."""
+        files = [tmp_path / f"{name}.py" for name in "abcd"]
+        busy = plan_tasks(dict(zip(files, [20.0, 10.0, 10.0, 10.0], strict=True)), jobs=4)
+        fair = plan_tasks(dict(zip(files, [10.0, 10.0, 10.0, 10.0], strict=True)), jobs=4)
+
+        assert [task for task in busy if task[0] == files[0]] == [(files[0], part, 2) for part in range(2)]
+        assert all(parts == 1 for _file, _part, parts in fair)
+
+    def test_parts_cover_whole_module(self):
+        """Test that the parts of a split module add up to the unsplit outputs."""
+        source = "".join(f"def func_{i}():\n    return {i}\n\n" for i in range(7))
+        for explode in (explode_source, explode_source_dirs):
+            whole = explode(source, "mod.py")
+            merged = {}
+            for part in range(3):
+                merged.update(explode(source, "mod.py", part=(part, 3)))
+            assert merged == whole
+
+    def test_parallel_run(self, tmp_path):
+        """Test a multi-process run including duplicates and recorded timings."""
+        input_dir = tmp_path / "input"
+        for name in ("a", "b"):
+            (input_dir / name).mkdir(parents=True)
+            (input_dir / name / "mod.py").write_text("def f():\n    return 1\n")
+        (input_dir / "big.py").write_text("".join(f"class C{i}:\n    pass\n\n" for i in range(50)))
+        output_dir = tmp_path / "output"
+
+        main(str(input_dir), str(output_dir), "dirs", jobs=2)
+
+        assert (output_dir / "a" / "mod" / "f.py").exists()
+        assert (output_dir / "b" / "mod" / "f.py").exists()
+        assert len(list((output_dir / "big").glob("c*.py"))) == 50
+        assert set(load_timings(output_dir)) == {"a/mod.py", "big.py"}
+
+        # Timings of removed files are pruned, and serial runs record none
+        (input_dir / "big.py").unlink()
+        main(str(input_dir), str(output_dir), "dirs", jobs=2)
+        assert set(load_timings(output_dir)) == {"a/mod.py"}
+        serial_output = tmp_path / "serial"
+        main(str(input_dir), str(serial_output), "dirs")
+        assert not (serial_output / TIMINGS_FILENAME).exists()
+
+    def test_parallel_events_match_serial(self, tmp_path):
+        """Test that events recorded in worker processes reach the event log and summary."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        for name in ("a", "b", "c"):
+            (input_dir / f"{name}.py").write_text(f"LIMIT = 1\n\ndef {name}():\n    return LIMIT\n")
+
+        def event_counts(jobs):
+            log_file = tmp_path / f"events_{jobs}.jsonl"
+            main(str(input_dir), str(tmp_path / f"output_{jobs}"), event_log=str(log_file), jobs=jobs)
+            return Counter(json.loads(line)["event"] for line in log_file.read_text().splitlines())
+
+        serial = event_counts(1)
+        assert serial["file_started"] == 3
+        assert event_counts(2) == serial
+
+
+class TestVerify:
+    """Test verification of exploded trees against their originals."""
+
+    SOURCE = (
+        "import os\n\n"
+        "LIMIT = 3\n\n"
+        "class Widget:\n"
+        "    def size(self):\n"
+        "        return LIMIT\n\n"
+        "def build(name):\n"
+        "    return os.path.join(name, 'x')\n"
+    )
+
+    def make_tree(self, tmp_path):
+        input_dir = tmp_path / "input"
+        (input_dir / "pkg").mkdir(parents=True)
+        (input_dir / "pkg" / "__init__.py").write_text("")
+        (input_dir / "pkg" / "mod.py").write_text(self.SOURCE)
+        (input_dir / "plain.py").write_text("VALUE = 1\n")
+        return input_dir
+
+    @pytest.mark.parametrize(
+        ("method", "options"),
+        [("files", {}), ("dirs", {}), ("dirs", {"shared_imports": True}), ("dirs", {"lazy_init": True})],
+    )
+    def test_exploded_tree_verifies(self, tmp_path, method, options):
+        """Test that a freshly exploded tree is reported equivalent."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), method, **options)
+
+        assert verify_tree(input_dir, output_dir, method) == []
+
+    def test_reports_mismatches(self, tmp_path):
+        """Test that changed definitions, missing modules and public names are reported."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "dirs")
+
+        exploded = output_dir / "pkg" / "mod"
+        (exploded / "build.py").write_text((exploded / "build.py").read_text().replace("'x'", "'y'"))
+        (exploded / "widget.py").unlink()
+        (exploded / "__init__.py").write_text((exploded / "__init__.py").read_text().replace("LIMIT = 3", ""))
+
+        problems = verify_tree(input_dir, output_dir, "dirs")
+
+        assert any("'build' differs" in problem for problem in problems)
+        assert any(".widget" in problem and "missing" in problem for problem in problems)
+        assert any("public names missing" in problem and "LIMIT" in problem for problem in problems)
+
+    def test_formatting_is_ignored_and_parallel(self, tmp_path):
+        """Test that reformatting is not a mismatch, and that parallel checks agree."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "files")
+        widget = output_dir / "pkg" / "mod_widget.py"
+        widget.write_text(widget.read_text().replace("    def size", "\n\n    def size"))
+
+        assert verify_tree(input_dir, output_dir, "files", jobs=2) == []
+
+    @pytest.mark.parametrize("method", ["files", "dirs"])
+    def test_original_relative_imports_are_not_mismatches(self, tmp_path, method):
+        """Test that the module's own `from . import x` and `from .package import name` are left alone."""
+        input_dir = self.make_tree(tmp_path)
+        (input_dir / "pkg" / "helpers.py").write_text("def helper():\n    return 1\n")
+        (input_dir / "pkg" / "sub").mkdir()
+        (input_dir / "pkg" / "sub" / "__init__.py").write_text("thing = 1\n")
+        (input_dir / "pkg" / "mod.py").write_text("from . import helpers\nfrom .sub import thing\n\n" + self.SOURCE)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), method)
+
+        problems = verify_tree(input_dir, output_dir, method)
+        if method == "files":
+            assert problems == []
+        else:
+            # dirs moves the module a level down without rewriting its own relative imports,
+            # which only the import check notices
+            assert problems == [problem for problem in problems if "fails to import" in problem]
+
+    def test_import_check_reports_runtime_mismatches(self, tmp_path):
+        """Test that import failures and runtime-only public names are reported."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "dirs")
+        exploded = output_dir / "pkg" / "mod"
+        (exploded / "widget.py").write_text((exploded / "widget.py").read_text() + "\nraise RuntimeError('boom')\n")
+        (output_dir / "plain" / "__init__.py").write_text("VALUE = 1\nglobals()['EXTRA'] = 2\n")
+
+        problems = verify_tree(input_dir, output_dir, "dirs")
+
+        assert any("pkg/mod.py: exploded module fails to import: RuntimeError: boom" in p for p in problems)
+        assert any("plain.py: unexpected public names after import: EXTRA" in p for p in problems)
+        assert len(problems) == 2
+
+    def test_resolve_module_accepts_packages(self, tmp_path):
+        """Test that relative modules resolve to plain modules and to packages."""
+        main_path = tmp_path / "pkg" / "mod" / "__init__.py"
+        (tmp_path / "pkg" / "mod" / "widget").mkdir(parents=True)
+        (tmp_path / "pkg" / "mod" / "widget" / "__init__.py").write_text("")
+        (tmp_path / "pkg" / "helpers.py").write_text("")
+
+        assert resolve_module(main_path, ".widget") == tmp_path / "pkg" / "mod" / "widget" / "__init__.py"
+        assert resolve_module(main_path, "..helpers") == tmp_path / "pkg" / "helpers.py"
+        assert resolve_module(main_path, ".missing") is None
+
+    def test_cli_exit_status(self, tmp_path):
+        """Test that the verify CLI mode exits with status 1 on mismatches."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output"
+        main(str(input_dir), str(output_dir), "files")
+        main(str(input_dir), str(output_dir), "files", verify=True)
+
+        (output_dir / "plain.py").write_text("VALUE = 1\nEXTRA = 2\n")
+        with pytest.raises(SystemExit) as exc_info:
+            main(str(input_dir), str(output_dir), "files", verify=True)
+        assert exc_info.value.code == 1
+
+
+class TestChunks:
+    """Test the budgeted 'chunks' explosion method."""
+
+    def test_pack_chunks(self):
+        """Test that packing is contiguous and counts shared items once per chunk."""
+        shared = {"os": 10}
+        chunks = pack_chunks([30, 30, 30, 100, 5], [{"os"}, {"os"}, set(), set(), {"os"}], shared, budget=80)
+
+        assert chunks == [[0, 1], [2], [3], [4]]
+        assert [i for chunk in chunks for i in chunk] == list(range(5))
+
+    def test_chunks_respect_budget_and_run(self, tmp_path, monkeypatch):
+        """Test that chunks stay within budget and cross-chunk references work."""
+        source = "from json import dumps\n\nBASE = 'x'\n\n" + "".join(
+            f"def func_{i}():\n    return dumps([BASE, {i}])\n\n" for i in range(40)
+        )
+        source += (
+            "def first():\n    return func_0() + last()\n\ndef last():\n    return func_39()\n\nRESULT = first()\n"
+        )
+        outputs = explode_source_chunks(source, "packed.py", chunk_budget=400)
+
+        chunk_files = [name for name in outputs if "/chunk_" in name]
+        assert len(chunk_files) > 1
+        assert all(len(outputs[name].encode()) <= 450 for name in chunk_files)
+        assert list(outputs)[-1] == "packed/__init__.py"
+
+        write_outputs(tmp_path, outputs)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        try:
+            module = importlib.import_module("packed")
+            assert module.RESULT == '["x", 0]["x", 39]'
+            assert module.func_17() == '["x", 17]'
+        finally:
+            for name in [name for name in sys.modules if name.startswith("packed")]:
+                del sys.modules[name]
+
+    @pytest.mark.parametrize("budget", [10, 8000])
+    def test_cross_chunk_cycles_and_variables_import(self, tmp_path, monkeypatch, budget):
+        """Test that mutually recursive chunks and variables referencing definitions can be imported."""
+        source = (
+            "def a():\n    return c()\n\n"
+            "def b():\n    return a() + c()\n\n"
+            "def c():\n    return HANDLERS['d']()\n\n"
+            "def d():\n    return 1\n\n"
+            "HANDLERS = {'d': d}\n\n"
+            "def e():\n    return HANDLERS['d']() + b()\n\n"
+            "RESULT = e()\n"
+        )
+        outputs = explode_source_chunks(source, "cyc.py", chunk_budget=budget)
+        assert sum("/chunk_" in name for name in outputs) == (5 if budget == 10 else 1)
+
+        write_outputs(tmp_path, outputs)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        try:
+            module = importlib.import_module("cyc")
+            assert module.RESULT == 3
+            assert module.a() == 1
+        finally:
+            for name in [name for name in sys.modules if name.startswith("cyc")]:
+                del sys.modules[name]
+
+    def test_token_budget_and_verify(self, tmp_path):
+        """Test token budgets through the CLI and verification of the result."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "mod.py").write_text("".join(f"class C{i}:\n    value = {i}\n\n" for i in range(30)))
+        (input_dir / "__init__.py").write_text("def helper():\n    return 1\n")
+        output_dir = tmp_path / "output"
+
+        main(str(input_dir), str(output_dir), "chunks", chunk_budget=40, chunk_unit="tokens")
+
+        assert len(list((output_dir / "mod").glob("chunk_*.py"))) > 1
+        assert (output_dir / "__init___helper.py").exists()
+        assert verify_tree(input_dir, output_dir, "chunks") == []
+
+    def test_invalid_unit(self):
+        """Test that an unknown budget unit is rejected."""
+        with pytest.raises(ValueError, match="Invalid chunk unit"):
+            explode_source_chunks("def f():\n    pass\n", "mod.py", chunk_unit="lines")
+
+
+class TestSharedDefinitions:
+    """Test content-addressed sharing of identical definitions across modules."""
+
+    HELPER = "import os\n\n\ndef helper(path):\n    return os.path.basename(path)\n"
+
+    def make_tree(self, tmp_path):
+        input_dir = tmp_path / "input" / "copypkg"
+        (input_dir / "sub").mkdir(parents=True)
+        (input_dir / "__init__.py").write_text("")
+        (input_dir / "sub" / "__init__.py").write_text("")
+        (input_dir / "a.py").write_text(self.HELPER + "\n\ndef only_a():\n    return helper('/x/a')\n")
+        (input_dir / "sub" / "b.py").write_text(self.HELPER + "\n\nclass OnlyB:\n    pass\n")
+        return input_dir
+
+    @pytest.mark.parametrize(
+        ("method", "options"),
+        [("files", {}), ("dirs", {}), ("dirs", {"lazy_init": True})],
+        ids=["files", "dirs", "lazy"],
+    )
+    def test_identical_definitions_are_shared(self, tmp_path, monkeypatch, method, options):
+        """Test that a copy-pasted helper is written once and imported from every site."""
+        input_dir = self.make_tree(tmp_path)
+        output_dir = tmp_path / "output" / "copypkg"
+
+        main(str(input_dir), str(output_dir), method, dedup_definitions=True, **options)
+
+        shared = list((output_dir / "_shared_definitions").glob("helper_*.py"))
+        assert len(shared) == 1
+        assert shared[0].read_text() == explode_source(self.HELPER, "a.py")["a_helper.py"]
+        assert not list(output_dir.rglob("*_helper.py"))
+        assert not list(output_dir.rglob("helper.py"))
+        assert verify_tree(input_dir, output_dir, method) == []
+
+        monkeypatch.syspath_prepend(str(output_dir.parent))
+        try:
+            a = importlib.import_module("copypkg.a")
+            b = importlib.import_module("copypkg.sub.b")
+            assert a.helper is b.helper
+            assert b.helper("/x/y.py") == "y.py"
+        finally:
+            for name in [name for name in sys.modules if name.startswith("copypkg")]:
+                del sys.modules[name]
+
+    def test_unique_and_original_imports_untouched(self, tmp_path):
+        """Test that unique definitions and the module's own relative imports stay in place."""
+        input_dir = self.make_tree(tmp_path)
+        (input_dir / "c.py").write_text("from .a import only_a\n\n\ndef only_a_twice():\n    return only_a() * 2\n")
+        output_dir = tmp_path / "output" / "copypkg"
+
+        main(str(input_dir), str(output_dir), "files", dedup_definitions=True)
+
+        assert (output_dir / "a_only_a.py").exists()
+        assert (output_dir / "a.py").exists()
+        assert "from .a import only_a" in (output_dir / "c.py").read_text()
+
+
+class TestReader:
+    """Test the encoding-aware, memory-mapped source reader."""
+
+    LATIN1_SOURCE = "# -*- coding: latin-1 -*-\nGREETING = 'café'\n\ndef greet():\n    return GREETING\n"
+
+    def test_encoding_cookie_is_honoured(self, tmp_path):
+        """Test that PEP 263 sources are exploded and copied without decoding errors."""
+        input_dir = tmp_path / "input"
+        input_dir.mkdir()
+        (input_dir / "latin.py").write_bytes(self.LATIN1_SOURCE.encode("latin-1"))
+        copied = "# -*- coding: latin-1 -*-\nNAME = 'naïve'\n".encode("latin-1")
+        (input_dir / "plain.py").write_bytes(copied)
+        output_dir = tmp_path / "output"
+
+        main(str(input_dir), str(output_dir), "files")
+
+        assert "café" in (output_dir / "latin_greet.py").read_text(encoding="utf-8")
+        assert (output_dir / "plain.py").read_bytes() == copied
+        assert "naïve" in format_bundle(explode_source(copied, "plain.py"))
+
+    def test_memory_mapped_sources(self, tmp_path, monkeypatch):
+        """Test that memory-mapped files explode like files read into memory."""
+        source_file = tmp_path / "mapped.py"
+        source_file.write_bytes(self.LATIN1_SOURCE.encode("latin-1"))
+        with open_source(source_file) as data:
+            expected = explode_source_dirs(data, source_file.name)
+
+        monkeypatch.setattr(reader, "MMAP_THRESHOLD", 1)
+        with open_source(source_file) as data:
+            assert isinstance(data, mmap.mmap)
+            assert explode_source_dirs(data, source_file.name) == expected
+        assert list(prefetch_sources([source_file])) == [(source_file, None)]
+
+    def test_prefetch_keeps_order(self, tmp_path):
+        """Test that batched prefetching yields every file in order with its content."""
+        files = []
+        for i in range(5):
+            files.append(tmp_path / f"m{i}.py")
+            files[-1].write_text(f"X = {i}\n")
+
+        prefetched = list(prefetch_sources(files, batch_size=2))
+
+        assert prefetched == [(file, file.read_bytes()) for file in files]